@@ -0,0 +1,291 @@
+"""Time every pipeline on synthetic inputs of growing size.
+
+Each (stage, rows) run happens in a fresh subprocess so peak RSS belongs to
+that stage alone. Inputs are generated once per size and seed and reused.
+Results are printed as a table and can be saved as JSON, and compared with
+an earlier run to catch regressions.
+
+Run from the repository root:
+
+    python benchmarks/bench_pipelines.py [--rows 10000 100000 ...] [--stages merge pivot ...]
+        [--output results.json] [--compare baseline.json --tolerance 0.2]
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_ROWS = [10_000, 100_000]
+FULL_ROWS = [10_000, 100_000, 1_000_000, 5_000_000]
+DATA_DIR = os.path.join(tempfile.gettempdir(), 'jumiapim-bench')
+
+# Seller exports per merge run; the rows are spread across them
+MERGE_FILES = 4
+
+
+def _input_path(data_dir, kind, rows, seed, extension):
+    return os.path.join(data_dir, f'{kind}_{rows}_{seed}.{extension}')
+
+
+def _generate(path, write):
+    """Write an input file once; a partial file is never left under `path`."""
+    if os.path.exists(path):
+        return path
+    temp_path = f'{path}.tmp'
+    write(temp_path)
+    os.replace(temp_path, path)
+    return path
+
+
+def prepare_inputs(stage, rows, seed, data_dir):
+    """Input file paths for `stage`, generating any that are missing."""
+    import generators
+
+    os.makedirs(data_dir, exist_ok=True)
+    if stage in ('merge', 'merge_streaming'):
+        per_file = -(-rows // MERGE_FILES)
+        paths = []
+        for part in range(MERGE_FILES):
+            part_rows = min(per_file, rows - part * per_file)
+            path = _input_path(data_dir, f'export{part}', part_rows, seed + part, 'csv')
+            paths.append(_generate(path, lambda p, n=part_rows, s=seed + part:
+                                   generators.write_csv(generators.seller_export(n, s), p, sep=';')))
+        return paths
+    if stage == 'pivot':
+        path = _input_path(data_dir, 'qc', rows, seed, 'csv')
+        return [_generate(path, lambda p: generators.write_csv(generators.qc_sheet(rows, seed), p))]
+    if stage in ('colors', 'pim'):
+        path = _input_path(data_dir, 'products', rows, seed, 'csv')
+        return [_generate(path, lambda p: generators.write_csv(generators.product_sets(rows, seed), p))]
+    if stage in ('colors_long', 'colors_nomatch'):
+        kind = stage.split('_')[1]
+        path = _input_path(data_dir, f'products_{kind}', rows, seed, 'csv')
+        return [_generate(path, lambda p: generators.write_csv(generators.product_sets(rows, seed, kind), p))]
+    if stage == 'split':
+        path = _input_path(data_dir, 'upload', rows, seed, 'xlsx')
+        return [_generate(path, lambda p: generators.write_split_workbook(p, rows, seed))]
+    raise ValueError(f'unknown stage {stage!r}')
+
+
+def run_merge(paths, workers, output_dir):
+    from jumiapim.merger import merged_csv
+
+    files = [open(path, 'rb') for path in paths]
+    try:
+        data, _, _ = merged_csv(files, 'bench')
+    finally:
+        for file in files:
+            file.close()
+    return len(data)
+
+
+def run_merge_streaming(paths, workers, output_dir):
+    from jumiapim.merger import stream_merge
+
+    output_path = os.path.join(output_dir, 'Global_bench.csv')
+    files = [open(path, 'rb') for path in paths]
+    try:
+        stream_merge(files, output_path, 'bench')
+    finally:
+        for file in files:
+            file.close()
+    return os.path.getsize(output_path)
+
+
+def run_pivot(paths, workers, output_dir):
+    from jumiapim import qc_report, reference_data
+    from jumiapim.readers import read_upload
+
+    with open(paths[0], 'rb') as file:
+        df = read_upload(file)
+    pivot_df, pim_df = qc_report.build_reports(df, reference_data.reason_codes())
+    return len(pivot_df) + len(pim_df)
+
+
+def run_colors(paths, workers, output_dir):
+    from jumiapim.color_check import check_products, load_rules
+    from jumiapim.readers import read_upload
+
+    with open(paths[0], 'rb') as file:
+        df = read_upload(file)
+    df, _ = check_products(df, *load_rules())
+    return len(df)
+
+
+def run_pim(paths, workers, output_dir):
+    from jumiapim import reference_data
+    from jumiapim.pim_batch import check_files
+
+    with open(paths[0], 'rb') as file:
+        files = [(os.path.basename(paths[0]), file.read())]
+    combined_df, _ = check_files(files, reference_data.common_colors(), workers=workers)
+    return len(combined_df)
+
+
+def run_split(paths, workers, output_dir):
+    from jumiapim import splitter
+
+    output_path = os.path.join(output_dir, splitter.zip_file_name('bench'))
+    splitter.split_file(paths[0], 'bench', workers=workers, output=output_path)
+    return os.path.getsize(output_path)
+
+
+STAGES = {
+    'merge': run_merge,
+    'merge_streaming': run_merge_streaming,
+    'pivot': run_pivot,
+    'colors': run_colors,
+    # Long descriptions and cells without any color term
+    'colors_long': run_colors,
+    'colors_nomatch': run_colors,
+    'pim': run_pim,
+    'split': run_split,
+}
+
+
+def _max_rss_mb(who):
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    max_rss = resource.getrusage(who).ru_maxrss
+    return max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def run_stage(stage, paths, workers):
+    """Run one stage in this process and return its measurements."""
+    # Load reference files and imports up front so only the stage is timed
+    from jumiapim import reference_data
+
+    reference_data.sellers(), reference_data.categories(), reference_data.common_colors()
+    baseline_rss = _max_rss_mb(resource.RUSAGE_SELF)
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        output_size = STAGES[stage](paths, workers, output_dir)
+        seconds = time.perf_counter() - start
+        cpu_seconds = time.process_time() - cpu_start
+
+    return {
+        'seconds': seconds,
+        'cpu_seconds': cpu_seconds,
+        'baseline_rss_mb': baseline_rss,
+        'peak_rss_mb': _max_rss_mb(resource.RUSAGE_SELF),
+        'children_peak_rss_mb': _max_rss_mb(resource.RUSAGE_CHILDREN),
+        'output_size': output_size,
+    }
+
+
+def measure(stage, rows, seed, workers, data_dir):
+    """Run `stage` once in a fresh interpreter and return its measurements."""
+    paths = prepare_inputs(stage, rows, seed, data_dir)
+    command = [sys.executable, os.path.abspath(__file__), '--child', stage, '--workers', str(workers), *paths]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=ROOT)
+    if completed.returncode != 0:
+        raise RuntimeError(f'{stage} at {rows} rows failed:\n{completed.stderr.strip()}')
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['input_bytes'] = sum(os.path.getsize(path) for path in paths)
+    return result
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=ROOT).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def environment():
+    import numpy as np
+    import pandas as pd
+
+    return {
+        'date': datetime.now().isoformat(timespec='seconds'),
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+    }
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing runs that got slower or bigger than `baseline` by
+    more than `tolerance` (a fraction)."""
+    previous = {(run['stage'], run['rows']): run for run in baseline['results']}
+    regressions = []
+    for run in results:
+        before = previous.get((run['stage'], run['rows']))
+        if before is None:
+            continue
+        for metric in ('seconds', 'peak_rss_mb'):
+            if run[metric] > before[metric] * (1 + tolerance):
+                regressions.append(f"{run['stage']} at {run['rows']:,} rows: {metric} "
+                                   f"{before[metric]:.2f} -> {run[metric]:.2f}")
+    return regressions
+
+
+def print_table(results):
+    print(f"{'stage':<16} {'rows':>10} {'seconds':>9} {'rows/s':>11} {'peak MB':>9} {'stage MB':>9} {'workers MB':>11}")
+    for run in results:
+        print(f"{run['stage']:<16} {run['rows']:>10,} {run['seconds']:>9.2f} {run['rows_per_second']:>11,.0f} "
+              f"{run['peak_rss_mb']:>9.0f} {run['peak_rss_mb'] - run['baseline_rss_mb']:>9.0f} "
+              f"{run['children_peak_rss_mb']:>11.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS, help="input sizes to run")
+    parser.add_argument('--full', action='store_true', help=f"run every size in {FULL_ROWS}")
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=1, help="runs per stage and size; the fastest is reported")
+    parser.add_argument('--workers', type=int, default=1, help="worker processes for pim and split")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=DATA_DIR, help="where generated inputs are kept between runs")
+    parser.add_argument('--output', help="write results to this JSON file")
+    parser.add_argument('--compare', help="JSON results of an earlier run to check for regressions")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed slowdown/growth for --compare")
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('paths', nargs='*', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    # Child mode: run a single stage and report it as one JSON line
+    if args.child:
+        print(json.dumps(run_stage(args.child, args.paths, args.workers)))
+        return 0
+
+    results = []
+    for rows in (FULL_ROWS if args.full else args.rows):
+        for stage in args.stages:
+            runs = [measure(stage, rows, args.seed, args.workers, args.data_dir) for _ in range(args.repeat)]
+            best = min(runs, key=lambda run: run['seconds'])
+            best.update(stage=stage, rows=rows, rows_per_second=rows / best['seconds'])
+            results.append(best)
+            print(f"{stage} {rows:,} rows: {best['seconds']:.2f}s", file=sys.stderr)
+
+    print_table(results)
+    report = {'environment': environment(), 'workers': args.workers, 'seed': args.seed, 'results': results}
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+
+    if args.compare:
+        with open(args.compare) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
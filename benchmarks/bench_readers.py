@@ -0,0 +1,73 @@
+"""Compare the Excel and CSV engines on the real reference workbooks.
+
+Run from the repository root:
+
+    python benchmarks/bench_readers.py [--repeat N]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jumiapim import readers  # noqa: E402
+
+WORKBOOKS = ['sellers.xlsx', 'category_tree.xlsx']
+
+
+def best_time(read, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        df = read()
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(df)
+
+
+def excel_engines():
+    engines = ['openpyxl']
+    if readers.HAS_CALAMINE:
+        engines.append('calamine')
+    return engines
+
+
+def csv_engines():
+    engines = ['c']
+    if readers.HAS_PYARROW:
+        engines.append('pyarrow')
+    return engines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help="runs per engine; the best is reported")
+    args = parser.parse_args()
+
+    results = []
+    for name in WORKBOOKS:
+        path = os.path.join(ROOT, name)
+        with open(path, 'rb') as file:
+            data = file.read()
+
+        for engine in excel_engines():
+            seconds, rows = best_time(lambda: pd.read_excel(io.BytesIO(data), engine=engine), args.repeat)
+            results.append((name, 'xlsx', engine, rows, seconds))
+
+        # Same table as CSV, for the CSV engines
+        csv_data = pd.read_excel(io.BytesIO(data), engine=readers.excel_engine()).to_csv(index=False).encode('utf-8')
+        for engine in csv_engines():
+            seconds, rows = best_time(lambda: pd.read_csv(io.BytesIO(csv_data), engine=engine), args.repeat)
+            results.append((name, 'csv', engine, rows, seconds))
+
+    print(f"{'file':<20} {'format':<7} {'engine':<10} {'rows':>8} {'seconds':>9} {'rows/s':>11}")
+    for name, file_format, engine, rows, seconds in results:
+        print(f"{name:<20} {file_format:<7} {engine:<10} {rows:>8} {seconds:>9.3f} {rows / seconds:>11,.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+"""Deterministic synthetic inputs for the pipeline benchmarks.
+
+Every generator takes a row count and a seed and returns the same data for
+the same arguments. Seller names, category IDs and colors are drawn from the
+real reference files, with a small share of unknown values mixed in so the
+lookups and the color check see misses as well as hits.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from jumiapim import reference_data  # noqa: E402
+from jumiapim.splitter import PRODUCT_SETS_SHEET  # noqa: E402
+
+# Data rows per worksheet; Excel allows 1,048,576 rows including the header
+MAX_SHEET_ROWS = 1_000_000
+
+# Share of seller names / categories that are not in the reference files
+UNMATCHED_SHARE = 0.02
+
+# Share of COLOR values with no known color term, and of blank ones
+NO_COLOR_SHARE = 0.15
+BLANK_COLOR_SHARE = 0.05
+
+BRANDS = ['Generic', 'Fashion', 'Samsung', 'Tecno', 'Infinix', 'Nike', 'Adidas', 'Oraimo', 'Hisense', 'Ramtons']
+PRODUCT_WORDS = ['Men', 'Women', 'Slim', 'Casual', 'Sneakers', 'T-Shirt', 'Dress', 'Phone Case', 'Backpack',
+                 'Watch', 'Jacket', 'Sandals', 'Hoodie', 'Jeans', 'Kettle', 'Blender', 'Earphones', 'Cap']
+COLOR_WORDS = ['Dark', 'Light', 'Multi', 'Matte', 'Glossy', 'Mixed', 'Assorted', 'As Picture']
+QC_REASONS = ['col', 'cat', 'var', 'bra']
+
+# Extra columns in a seller export that the merger does not read
+EXPORT_EXTRA_COLUMNS = ['Price', 'SalePrice', 'Quantity', 'Status', 'Description']
+
+
+def _choice(rng, values, rows):
+    return np.asarray(values, dtype=object)[rng.integers(0, len(values), rows)]
+
+
+def _with_unmatched(rng, values, rows, unknown):
+    """`rows` draws from `values`, with UNMATCHED_SHARE of them set to `unknown`."""
+    drawn = _choice(rng, values, rows)
+    drawn[rng.random(rows) < UNMATCHED_SHARE] = unknown
+    return drawn
+
+
+def _codes(prefix, numbers):
+    return pd.Series(numbers).map(lambda number: f'{prefix}{number:08d}').to_numpy(dtype=object)
+
+
+def _product_names(rng, rows):
+    first = _choice(rng, PRODUCT_WORDS, rows)
+    second = _choice(rng, PRODUCT_WORDS, rows)
+    return (pd.Series(first) + ' ' + pd.Series(second)).to_numpy(dtype=object)
+
+
+def seller_names():
+    return reference_data.sellers()['SellerName'].dropna().astype(str).unique()
+
+
+def category_ids():
+    return reference_data.category_tree()['PrimaryCategory'].dropna().unique()
+
+
+def color_values(rng, rows):
+    """COLOR cells: a known color term, alone or among other words, plus
+    values with no known term and blanks."""
+    colors = sorted(reference_data.common_colors())
+    prefix = _choice(rng, COLOR_WORDS + [''] * len(COLOR_WORDS), rows)
+    term = _choice(rng, colors, rows)
+    values = (pd.Series(prefix) + ' ' + pd.Series(term)).str.strip().to_numpy(dtype=object)
+
+    draw = rng.random(rows)
+    values[draw < NO_COLOR_SHARE] = _choice(rng, COLOR_WORDS, rows)[draw < NO_COLOR_SHARE]
+    values[draw < BLANK_COLOR_SHARE] = None
+    return values
+
+
+def long_color_values(rng, rows, words=60):
+    """COLOR cells holding a product description of about `words` words,
+    with a known color term near the end of some of them."""
+    colors = sorted(reference_data.common_colors())
+    text = pd.Series(_product_names(rng, rows))
+    for _ in range(words // 2 - 1):
+        text = text + ' ' + pd.Series(_product_names(rng, rows))
+    values = (text + ' ' + pd.Series(_choice(rng, colors, rows))).to_numpy(dtype=object)
+
+    draw = rng.random(rows)
+    values[draw < NO_COLOR_SHARE] = text.to_numpy(dtype=object)[draw < NO_COLOR_SHARE]
+    return values
+
+
+def no_color_values(rng, rows):
+    """COLOR cells that never contain a known color term."""
+    return _product_names(rng, rows)
+
+
+def seller_export(rows, seed=0):
+    """A seller product export as read by the Files page."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'SellerSku': _codes('SKU', np.arange(rows)),
+        'Name': _product_names(rng, rows),
+        'Brand': _choice(rng, BRANDS, rows),
+        'PrimaryCategory': _with_unmatched(rng, category_ids(), rows, 9999999),
+        'SellerName': _with_unmatched(rng, seller_names(), rows, 'Unknown Seller'),
+        'Price': rng.integers(100, 50_000, rows),
+        'SalePrice': rng.integers(100, 50_000, rows),
+        'Quantity': rng.integers(0, 500, rows),
+        'Status': _choice(rng, ['active', 'inactive'], rows),
+        'Description': _product_names(rng, rows),
+    })
+
+
+def qc_sheet(rows, seed=0):
+    """A QC sheet for the Pivot table page: each row is either approved
+    (`app`) or rejected (`rej`) with a reason code."""
+    rng = np.random.default_rng(seed)
+    sellers = seller_names()[:500]
+    rejected = rng.random(rows) < 0.3
+    return pd.DataFrame({
+        'PRODUCT_SET_SID': _codes('PS', np.arange(rows)),
+        'PARENTSKU': _codes('P', rng.integers(0, max(rows // 3, 1), rows)),
+        'SELLER_NAME': _choice(rng, sellers, rows),
+        'CATEGORY': _choice(rng, ['Fashion', 'Phones & Tablets', 'Home & Office', 'Health & Beauty', 'Electronics'], rows),
+        'app': np.where(rejected, None, 'x'),
+        'rej': np.where(rejected, 'x', None),
+        'reason': np.where(rejected, _choice(rng, QC_REASONS, rows), None),
+    })
+
+
+# COLOR generators for product_sets
+COLOR_KINDS = {'colors': color_values, 'long': long_color_values, 'nomatch': no_color_values}
+
+
+def product_sets(rows, seed=0, colors='colors'):
+    """A product export for the Color and PIM pages; `colors` picks the kind
+    of COLOR values (see COLOR_KINDS)."""
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'PRODUCT_SET_SID': _codes('PS', np.arange(rows)),
+        'PARENTSKU': _codes('P', np.arange(rows)),
+        'NAME': _product_names(rng, rows),
+        'BRAND': _choice(rng, BRANDS, rows),
+        'CATEGORY_CODE': _with_unmatched(rng, category_ids(), rows, 9999999),
+        'COLOR': COLOR_KINDS[colors](rng, rows),
+    })
+
+
+def write_csv(df, path, sep=','):
+    df.to_csv(path, index=False, sep=sep)
+
+
+def write_split_workbook(path, rows, seed=0, sheet_rows=MAX_SHEET_ROWS):
+    """A PIM upload workbook for Split Files: a ProductSets sheet plus data
+    sheets of at most `sheet_rows` rows each, `rows` in total."""
+    rng = np.random.default_rng(seed)
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True})
+    try:
+        product_sets_sheet = workbook.add_worksheet(PRODUCT_SETS_SHEET)
+        product_sets_sheet.write_row(0, 0, ['ProductSetSid', 'Note'])
+        product_sets_sheet.write_row(1, 0, ['PS-BATCH', 'synthetic'])
+
+        header = ['ProductSetSid', 'ParentSKU', 'Status', 'Reason', 'Comment']
+        status = _choice(rng, ['Approved', 'Rejected'], rows)
+        reasons = reference_data.reason_codes().set_index('code')['reason']
+        reason = np.where(status == 'Rejected', _choice(rng, reasons.to_numpy(), rows), '')
+
+        for sheet_number, start in enumerate(range(0, max(rows, 1), sheet_rows), start=1):
+            worksheet = workbook.add_worksheet(f'Upload_{sheet_number}')
+            worksheet.write_row(0, 0, header)
+            for offset, index in enumerate(range(start, min(start + sheet_rows, rows)), start=1):
+                worksheet.write_row(offset, 0, [f'PS{index:08d}', f'P{index // 3:08d}', status[index], reason[index], ''])
+    finally:
+        workbook.close()
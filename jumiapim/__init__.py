@@ -0,0 +1,6 @@
+"""Jumia PIM processing pipelines, usable without Streamlit.
+
+The Streamlit pages are thin wrappers over these modules, and the same
+pipelines run headless through the command line (``python -m jumiapim``).
+Nothing in this package imports streamlit.
+"""
@@ -0,0 +1,176 @@
+"""Command line entry point: python -m jumiapim merge|pivot|split|colors ..."""
+import argparse
+import os
+import sys
+from datetime import datetime
+from functools import partial
+
+from . import outputs, reference_data
+from .jobs import expand_inputs, run_jobs
+
+
+def _stem(path):
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def _write(path, data):
+    with open(path, 'wb') as file:
+        file.write(data)
+    return path
+
+
+def pivot_job(path, output_dir, output_format='xlsx'):
+    from . import qc_report
+    from .readers import read_upload
+
+    with open(path, 'rb') as file:
+        df = read_upload(file)
+    pivot_df, pim_df = qc_report.build_reports(df, reference_data.reason_codes())
+
+    pivot_path = qc_report.unique_output_path(output_dir, f'Pivot_Date_{_stem(path)}', 'csv')
+    pivot_df.to_csv(pivot_path, index=False)
+    pim_path = qc_report.unique_output_path(output_dir, f'PIM_Date_Time_{_stem(path)}', output_format)
+    _write(pim_path, outputs.to_bytes(pim_df, output_format))
+    return [pivot_path, pim_path], []
+
+
+def split_job(path, output_dir, chunk_size, current_date):
+    from . import splitter
+
+    # The zip is written straight to its output file
+    output_path = os.path.join(output_dir, f'{_stem(path)}_{splitter.zip_file_name(current_date)}')
+    splitter.split_file(path, current_date, chunk_size, output=output_path)
+    return [output_path], []
+
+
+def colors_job(path, output_dir, current_date, output_format='xlsx', incremental=False):
+    from .color_check import check_products, color_state, load_rules
+    from .readers import read_upload
+
+    with open(path, 'rb') as file:
+        df = read_upload(file)
+    df, messages = check_products(df, *load_rules(), store=color_state() if incremental else None)
+    output_name = outputs.file_name(f'Output_PIM_{_stem(path)}_{current_date}', output_format)
+    return [_write(os.path.join(output_dir, output_name), outputs.to_bytes(df, output_format))], messages
+
+
+def _report(results):
+    """Print one line per job, plus the messages of checks that could not
+    run; returns the number of failed jobs.
+
+    Jobs return (output paths, messages)."""
+    failures = 0
+    for path, result, seconds, error in results:
+        if error:
+            failures += 1
+            print(f"FAILED {path} ({seconds:.2f}s): {error}", file=sys.stderr)
+            continue
+        output_paths, messages = result
+        print(f"ok     {path} ({seconds:.2f}s) -> {', '.join(output_paths)}")
+        for message in messages:
+            print(f"       {path}: {message}", file=sys.stderr)
+    return failures
+
+
+def run_merge(args, paths):
+    from .merger import merge_timestamp, merged_csv, output_file_name, stream_merge
+
+    timestamp = merge_timestamp()
+    output_path = os.path.join(args.output_dir, output_file_name(timestamp))
+    files = [open(path, 'rb') for path in paths]
+    try:
+        if args.streaming:
+            unmatched, conflicting = stream_merge(files, output_path, timestamp)
+        else:
+            data, unmatched, conflicting = merged_csv(files, timestamp)
+            _write(output_path, data)
+    finally:
+        for file in files:
+            file.close()
+
+    print(f"Merged {len(paths)} file(s) -> {output_path}")
+    for key, missing in unmatched.items():
+        if len(missing):
+            print(f"{len(missing)} {key} value(s) not found in the reference files", file=sys.stderr)
+    for key, rows in conflicting.items():
+        for value, group in rows.groupby(key, sort=False):
+            print(f"{key} {value!r} has conflicting entries in the reference files: "
+                  f"{', '.join(map(str, group.iloc[:, 1]))} (using the first)", file=sys.stderr)
+    return 0
+
+
+def run_pivot(args, paths):
+    job = partial(pivot_job, output_dir=args.output_dir, output_format=args.format or 'xlsx')
+    return _report(run_jobs(job, paths, args.workers))
+
+
+def run_split(args, paths):
+    job = partial(split_job, output_dir=args.output_dir, chunk_size=args.chunk_size,
+                  current_date=datetime.now().strftime("%Y-%m-%d"))
+    return _report(run_jobs(job, paths, args.workers))
+
+
+def run_colors(args, paths):
+    current_date = datetime.now().strftime('%Y-%m-%d')
+    if not args.combined:
+        job = partial(colors_job, output_dir=args.output_dir, current_date=current_date,
+                      output_format=args.format or 'xlsx', incremental=args.incremental)
+        # The state store is shared, so incremental runs check one file at a time
+        return _report(run_jobs(job, paths, 1 if args.incremental else args.workers))
+
+    # PIM page behaviour: one combined CSV for all files
+    from .pim_batch import check_files
+
+    files = []
+    for path in paths:
+        with open(path, 'rb') as file:
+            files.append((path, file.read()))
+    combined_df, summary_df = check_files(files, reference_data.common_colors(), workers=args.workers)
+    output_format = args.format or 'csv'
+    output_path = _write(os.path.join(args.output_dir, outputs.file_name(f"Output_PIM_{current_date}", output_format)),
+                         outputs.to_bytes(combined_df, output_format))
+    print(summary_df.to_string(index=False))
+    print(f"-> {output_path}")
+    return int((summary_df['Error'] != '').sum())
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='jumiapim', description="Run the Jumia PIM pipelines without the browser.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_command(name, help_text, handler):
+        command = subparsers.add_parser(name, help=help_text)
+        command.add_argument('inputs', nargs='+', help="input files or glob patterns (quote them)")
+        command.add_argument('-o', '--output-dir', default='.', help="directory for the output files")
+        command.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                             help="files processed in parallel")
+        command.set_defaults(handler=handler)
+        return command
+
+    command = add_command('merge', "merge seller CSV exports into one Global CSV", run_merge)
+    command.add_argument('--streaming', action='store_true', help="constant-memory chunked merge")
+
+    command = add_command('pivot', "build Pivot and PIM files from QC sheets", run_pivot)
+    command.add_argument('-f', '--format', choices=list(outputs.FORMATS), help="PIM file format (default: xlsx)")
+
+    command = add_command('split', "split PIM workbooks into zipped chunk workbooks", run_split)
+    command.add_argument('--chunk-size', type=int, default=9998, help="rows per chunk workbook")
+
+    command = add_command('colors', "run the Generic-brand and color checks", run_colors)
+    command.add_argument('--combined', action='store_true',
+                         help="write one combined CSV like the PIM page instead of one workbook per file")
+    command.add_argument('-f', '--format', choices=list(outputs.FORMATS),
+                         help="output format (default: xlsx, or csv with --combined)")
+    command.add_argument('--incremental', action='store_true',
+                         help="reuse color results of earlier runs for unchanged product sets (not with --combined)")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    paths = expand_inputs(args.inputs)
+    if not paths:
+        print("No input files matched.", file=sys.stderr)
+        return 2
+    os.makedirs(args.output_dir, exist_ok=True)
+    return 1 if args.handler(args, paths) else 0
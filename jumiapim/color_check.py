@@ -0,0 +1,61 @@
+from . import incremental, profiling, reference_data
+from .color_matcher import build_color_pattern, match_colors_in_batches
+from .validation import brand_is, build_category_index, check_generic_brand
+
+
+# Incremental mode: color results are stored per product set and reused
+# while its COLOR value is unchanged
+STATE_KEY = ['PRODUCT_SET_SID']
+COLOR_COLUMNS = ['Check_Color', 'Color_Match', 'Color_Position']
+
+
+def color_state():
+    """State store for incremental color checks, tied to the color list version."""
+    return incremental.StateStore('colors', (reference_data.reference_version(reference_data.COMMON_COLORS_FILE),))
+
+
+def load_rules():
+    """Compiled color pattern and FAS category index from the reference files."""
+    color_pattern = build_color_pattern(reference_data.common_colors())
+    fas_index = build_category_index(reference_data.category_fas()['ID'])
+    return color_pattern, fas_index
+
+
+def check_products(df, color_pattern, fas_index, progress=None, store=None):
+    """Add check_Brand and the color columns to a product export.
+
+    With a `store` (see color_state) only product sets that are new or whose
+    COLOR changed are matched. Returns (df, messages); messages explain
+    checks that could not run.
+    """
+    messages = []
+
+    # Check if 'BRAND' column exists in the uploaded file
+    if 'BRAND' in df.columns:
+        # Check if any value in 'BRAND' column is 'Generic'
+        if brand_is(df['BRAND'], 'generic').any():
+            # Create a new column 'check_Brand' in the output file
+            with profiling.span('check brand', rows=len(df)):
+                df['check_Brand'] = check_generic_brand(df, fas_index)
+        else:
+            messages.append("Error: No value 'Generic' found in 'BRAND' column of the uploaded file.")
+    else:
+        messages.append("Error: 'BRAND' column not found in the uploaded file.")
+
+    # Now, let's check for colors
+    if 'COLOR' in df.columns:
+        # Check colors in batches, reporting progress once per batch
+        def match(part):
+            return match_colors_in_batches(part['COLOR'], color_pattern, max_updates=20, progress=progress)
+
+        with profiling.span('match colors', rows=len(df)):
+            if store is not None and set(STATE_KEY) <= set(df.columns):
+                colors_df, _ = incremental.update(df, store, STATE_KEY, ['COLOR'], COLOR_COLUMNS, match)
+                if progress is not None:
+                    progress(1.0)
+            else:
+                colors_df = match(df)
+        # Adds Check_Color plus the matched term and its position
+        df = df.join(colors_df)
+
+    return df, messages
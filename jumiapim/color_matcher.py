@@ -0,0 +1,107 @@
+import math
+import re
+
+import numpy as np
+import pandas as pd
+
+from .readers import HAS_PYARROW
+
+
+def load_colors_from_txt(file_path):
+    """Read one color term per line, lower-cased, skipping blank lines."""
+    with open(file_path, 'r') as file:
+        colors = {line.strip().lower() for line in file}
+    colors.discard('')
+    return colors
+
+
+def build_color_pattern(colors):
+    """Compile all color terms into a single regex.
+
+    The pattern only holds the alternation of terms, with no groups, so it
+    can be tested without capturing anything. Longer terms come first so
+    "sky blue" wins over "blue" at the same position.
+    """
+    terms = sorted({color.lower() for color in colors if color}, key=lambda c: (-len(c), c))
+    alternation = '|'.join(re.escape(term) for term in terms)
+    return re.compile(f'(?:{alternation})', flags=re.IGNORECASE | re.DOTALL)
+
+
+def _first_terms(cells, pattern):
+    """The leftmost color term in each cell of `cells`, which all contain one."""
+    if HAS_PYARROW:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+
+        # RE2 picks the leftmost match and, at the same offset, the first
+        # alternative, like Python's re does
+        array = pa.array(cells.to_numpy(dtype=object), type=pa.string())
+        return pc.extract_regex(array, f'(?is)(?P<term>{pattern.pattern})').field('term').to_pylist()
+    return [pattern.search(cell).group(0) for cell in cells]
+
+
+def _offset(cell, term, pattern):
+    """Offset of the leftmost color term `term` in `cell`."""
+    lowered = cell.lower()
+    # The leftmost match is also the first occurrence of its term, unless
+    # lower-casing changed the length of the text (rare)
+    if len(lowered) == len(cell):
+        return lowered.find(term)
+    return pattern.search(cell).start()
+
+
+def match_colors(series, pattern):
+    """Run the color pattern over a whole Series.
+
+    Every cell gets one vectorized yes/no test; the term and its position are
+    only looked up in the cells that contain a color.
+
+    Returns a DataFrame aligned with `series` holding:
+      Check_Color    - "Yes"/"No"
+      Color_Match    - the (lower-cased) color term that matched, or ""
+      Color_Position - offset of the match in the cell text, or -1
+    """
+    text = series.astype('string')
+    found = text.str.contains(pattern.pattern, case=False, regex=True).fillna(False).to_numpy(dtype=bool)
+
+    match = np.full(len(series), '', dtype=object)
+    position = np.full(len(series), -1, dtype='int64')
+    if found.any():
+        cells = text[found]
+        terms = [term.lower() for term in _first_terms(cells, pattern)]
+        match[found] = terms
+        position[found] = [_offset(cell, term, pattern) for cell, term in zip(cells, terms)]
+
+    result = pd.DataFrame(index=series.index)
+    result['Check_Color'] = np.where(found, 'Yes', 'No')
+    result['Color_Match'] = pd.Series(match, index=series.index, dtype=object)
+    result['Color_Position'] = position
+    return result
+
+
+def match_colors_in_batches(series, pattern, max_updates=20, progress=None):
+    """Same as match_colors, but works through the Series in at most
+    `max_updates` slices and calls `progress(fraction)` after each one.
+
+    Results are written into preallocated columns, so memory does not grow
+    with the number of batches.
+    """
+    total_rows = len(series)
+    check = np.empty(total_rows, dtype=object)
+    match = np.empty(total_rows, dtype=object)
+    position = np.empty(total_rows, dtype='int64')
+
+    batch_size = max(1, math.ceil(total_rows / max_updates))
+    for start in range(0, total_rows, batch_size):
+        stop = min(start + batch_size, total_rows)
+        batch = match_colors(series.iloc[start:stop], pattern)
+        check[start:stop] = batch['Check_Color'].to_numpy()
+        match[start:stop] = batch['Color_Match'].to_numpy()
+        position[start:stop] = batch['Color_Position'].to_numpy()
+        if progress is not None:
+            progress(stop / total_rows)
+
+    return pd.DataFrame(
+        {'Check_Color': check, 'Color_Match': match, 'Color_Position': position},
+        index=series.index,
+    )
@@ -0,0 +1,137 @@
+import csv
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from . import profiling
+
+# Columns the merger needs from each seller export
+INPUT_COLUMNS = ["SellerName", "Name", "Brand", "PrimaryCategory", "SellerSku"]
+
+# Low-cardinality columns kept as categoricals while merging
+CATEGORICAL_COLUMNS = ["SellerName", "Brand", "PrimaryCategory"]
+
+# Columns always read as text, so e.g. SKU "00123" keeps its leading zeros
+TEXT_COLUMNS = ["Name", "SellerSku"]
+
+MAX_WORKERS = 8
+
+# Cells read_csv treats as missing by default (its na_values), for the
+# pyarrow path; taken from pandas when its private module still has them
+try:
+    from pandas._libs.parsers import STR_NA_VALUES as NA_VALUES
+except ImportError:
+    NA_VALUES = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                 '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+
+
+def detect_delimiter(file):
+    # Read a sample of the file to detect the delimiter
+    sample = file.read(1024)
+    file.seek(0)  # Reset file pointer to beginning
+    # Decode the sample bytes to a string
+    sample_str = sample.decode('utf-8', errors='ignore')
+    # Use CSV Sniffer to detect delimiter
+    dialect = csv.Sniffer().sniff(sample_str)
+    return dialect.delimiter
+
+
+def read_header(file, delimiter):
+    """Column names from the first line of the file."""
+    first_line = file.readline()
+    file.seek(0)
+    return next(csv.reader(io.StringIO(first_line.decode('utf-8-sig', errors='ignore')), delimiter=delimiter), [])
+
+
+def infer_category_types(df):
+    """Turn numeric-looking categories (e.g. PrimaryCategory IDs) into numbers.
+
+    The C parser always reads categories as strings; converting them keeps
+    lookups against the numeric reference keys working. Blank cells stay
+    missing instead of making the whole column float, so the merged CSV
+    writes IDs as 1030909 even when some are blank (merging whole files
+    with pd.concat wrote 1030909.0 then).
+    """
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            categories = df[column].cat.categories
+            if categories.dtype.kind in 'iuf':
+                continue
+            try:
+                df[column] = df[column].cat.rename_categories(pd.to_numeric(categories))
+            except (ValueError, TypeError):
+                pass
+    return df
+
+
+def _read_with_pyarrow(file, delimiter, usecols, dtype):
+    """pd.read_csv(..., engine='pyarrow'), except that text and categorical
+    columns are parsed as text, like the C parser does, instead of being
+    inferred and cast afterwards (which turns "00123" into "123")."""
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+
+    column_types = {column: pa.string() for column in TEXT_COLUMNS if column in usecols}
+    column_types.update({column: pa.dictionary(pa.int32(), pa.string())
+                         for column in CATEGORICAL_COLUMNS if column in usecols})
+    table = pa_csv.read_csv(
+        file,
+        parse_options=pa_csv.ParseOptions(delimiter=delimiter),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=usecols,
+            column_types=column_types,
+            # The same missing-value markers as the C parser
+            null_values=sorted(NA_VALUES),
+            strings_can_be_null=True,
+        ),
+    )
+    return table.to_pandas().astype(dtype)
+
+
+def read_seller_export(file, columns=INPUT_COLUMNS):
+    """Parse one seller export, reading only `columns` at compact dtypes.
+
+    Uses pyarrow's CSV parser when it is installed and falls back to the C
+    parser (e.g. for quoted values spanning several lines). Both read
+    TEXT_COLUMNS as text, as merger.iter_export_chunks does.
+    """
+    delimiter = detect_delimiter(file)
+    usecols = [column for column in read_header(file, delimiter) if column in columns]
+    dtype = {column: 'category' for column in CATEGORICAL_COLUMNS if column in usecols}
+    dtype.update({column: str for column in TEXT_COLUMNS if column in usecols})
+
+    try:
+        df = _read_with_pyarrow(file, delimiter, usecols, dtype)
+    except (ImportError, ValueError):
+        file.seek(0)
+        df = pd.read_csv(file, delimiter=delimiter, usecols=usecols, dtype=dtype)
+    return infer_category_types(df)
+
+
+def _align_categories(frames):
+    """Give each categorical column the same categories in every frame, so
+    pd.concat keeps it categorical instead of falling back to object."""
+    for column in CATEGORICAL_COLUMNS:
+        categories = pd.Index([])
+        for df in frames:
+            if column in df.columns:
+                categories = categories.union(df[column].cat.categories)
+        dtype = pd.CategoricalDtype(categories)
+        for df in frames:
+            if column in df.columns:
+                df[column] = df[column].cat.set_categories(categories)
+            else:
+                df[column] = pd.Series(pd.NA, index=df.index, dtype=dtype)
+    return frames
+
+
+def read_seller_exports(files, workers=None):
+    """Parse all uploaded exports concurrently and concatenate them in upload order."""
+    workers = workers or min(MAX_WORKERS, max(1, len(files)))
+    with profiling.span('parse exports') as span:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            frames = list(executor.map(read_seller_export, files))
+        df = pd.concat(_align_categories(frames), ignore_index=True)
+        span.rows = len(df)
+    return df
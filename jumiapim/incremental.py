@@ -0,0 +1,174 @@
+"""Incremental processing: only recompute rows that are new or changed.
+
+A state store keeps, per row of earlier runs, a hash of the row's key
+columns, a hash of its input columns and the columns computed for it. On the
+next run rows whose key and inputs hash to the same values reuse the stored
+results; only the rest are passed to the compute function. The store is
+tied to the versions of the reference files the results depend on, so
+editing e.g. common_colors.txt starts from scratch.
+
+States are Parquet files (pickles when pyarrow is missing) under
+JUMIAPIM_STATE_DIR, by default .incremental_state in the repository root.
+Rows from earlier runs stay in the store when they are missing from a later
+upload, so uploads that cover different sellers on different days still
+reuse their results. Each row records the day it was last seen; rows not seen
+for JUMIAPIM_STATE_MAX_AGE_DAYS days (90 by default) are dropped, and beyond
+JUMIAPIM_STATE_MAX_ROWS rows (2,000,000 by default) the least recently seen
+ones go first.
+"""
+import glob
+import logging
+import os
+import tempfile
+import threading
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .readers import HAS_PYARROW
+from .result_cache import fingerprint
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_DIR = os.environ.get('JUMIAPIM_STATE_DIR', os.path.join(BASE_DIR, '.incremental_state'))
+
+KEY_HASH = '_key_hash'
+ROW_HASH = '_row_hash'
+LAST_SEEN = '_last_seen'
+STATE_COLUMNS = [KEY_HASH, ROW_HASH, LAST_SEEN]
+
+# Streamlit sessions are threads of one process; saves go one at a time
+_save_lock = threading.Lock()
+
+# Limits on what a store keeps between runs
+MAX_AGE_DAYS = int(os.environ.get('JUMIAPIM_STATE_MAX_AGE_DAYS', '90'))
+MAX_ROWS = int(os.environ.get('JUMIAPIM_STATE_MAX_ROWS', '2000000'))
+
+
+def row_hashes(df, columns):
+    """uint64 hash of the values in `columns` for every row of `df`."""
+    return pd.util.hash_pandas_object(df[columns], index=False).to_numpy()
+
+
+class StateStore:
+    """Stored results of earlier runs for one pipeline.
+
+    `name` identifies the pipeline and `versions` the reference data its
+    results depend on; a change of either means a different (empty) state.
+    """
+
+    def __init__(self, name, versions=(), directory=None):
+        self.name = name
+        self.directory = directory or STATE_DIR
+        self.extension = 'parquet' if HAS_PYARROW else 'pkl'
+        self.path = os.path.join(self.directory, f'{name}_{fingerprint(*versions)[:16]}.{self.extension}')
+        # Row counts of the last update(), for reporting
+        self.last_stats = None
+
+    def load(self):
+        """The stored state, or None when there is none for these versions."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            if self.extension == 'parquet':
+                return pd.read_parquet(self.path)
+            return pd.read_pickle(self.path)
+        except Exception:
+            # A damaged state only costs a full recompute
+            return None
+
+    def save(self, state):
+        """Replace the stored state; states for other versions are removed."""
+        with _save_lock:
+            os.makedirs(self.directory, exist_ok=True)
+            # A temp file of its own, so concurrent saves never share one
+            descriptor, temp_path = tempfile.mkstemp(dir=self.directory, prefix=f'.{self.name}_', suffix='.tmp')
+            os.close(descriptor)
+            try:
+                if self.extension == 'parquet':
+                    state.to_parquet(temp_path, index=False)
+                else:
+                    state.to_pickle(temp_path)
+                os.replace(temp_path, self.path)
+            except BaseException:
+                os.remove(temp_path)
+                raise
+            for path in glob.glob(os.path.join(self.directory, f'{self.name}_*.{self.extension}')):
+                if path != self.path:
+                    os.remove(path)
+
+    def clear(self):
+        with _save_lock:
+            for path in glob.glob(os.path.join(self.directory, f'{self.name}_*')):
+                os.remove(path)
+
+
+def prune(state, today, max_age_days=None, max_rows=None):
+    """`state` without rows last seen more than `max_age_days` days before
+    `today`, cut to the `max_rows` most recently seen rows."""
+    max_age_days = MAX_AGE_DAYS if max_age_days is None else max_age_days
+    max_rows = MAX_ROWS if max_rows is None else max_rows
+    state = state[state[LAST_SEEN] >= today - pd.Timedelta(days=max_age_days)]
+    if len(state) > max_rows:
+        # Stable sort keeps this run's rows (at the end) ahead of older ties
+        state = state.sort_values(LAST_SEEN, kind='stable').iloc[-max_rows:]
+    return state.reset_index(drop=True)
+
+
+def update(df, store, key_columns, input_columns, output_columns, compute, today=None):
+    """Compute `output_columns` for `df`, reusing results stored in `store`.
+
+    `compute(part)` gets the rows of `df` that are new or changed and must
+    return a DataFrame with `output_columns`, one row per row of `part` in
+    the same order. Returns (outputs, stats): `outputs` is aligned with `df`
+    and `stats` counts the rows reused and computed. The store is updated
+    with this run's rows, marked as seen `today`, and pruned.
+    """
+    key_hash = row_hashes(df, key_columns)
+    input_hash = row_hashes(df, input_columns)
+    today = pd.Timestamp(today or datetime.now()).normalize()
+
+    # Rows whose key was seen before with the same inputs; an empty or
+    # outdated state counts as none
+    state = store.load()
+    if (state is not None and len(state) and list(state.columns[:3]) == STATE_COLUMNS
+            and list(state.columns[3:]) == list(output_columns)):
+        state_index = pd.Index(state[KEY_HASH])
+        positions = state_index.get_indexer(key_hash)
+        stored_hash = state[ROW_HASH].to_numpy().take(positions)
+        reuse = (positions >= 0) & (stored_hash == input_hash)
+    else:
+        state = None
+        reuse = np.zeros(len(df), dtype=bool)
+
+    # Stored results and fresh ones, put back in the order of df
+    parts = []
+    if reuse.any():
+        reused = state.iloc[positions[reuse], 3:]
+        reused.index = np.flatnonzero(reuse)
+        parts.append(reused)
+    if not reuse.all():
+        computed = compute(df[~reuse])[output_columns]
+        computed.index = np.flatnonzero(~reuse)
+        parts.append(computed)
+    if not parts:
+        outputs = pd.DataFrame(columns=output_columns)
+    else:
+        outputs = pd.concat(parts).sort_index() if len(parts) > 1 else parts[0]
+    outputs.index = df.index
+
+    # This run's rows replace earlier ones with the same key
+    run_state = pd.concat([pd.DataFrame({KEY_HASH: key_hash, ROW_HASH: input_hash, LAST_SEEN: today}),
+                           outputs.reset_index(drop=True)], axis=1)
+    run_state = run_state.drop_duplicates(KEY_HASH, keep='last')
+    if state is not None:
+        state = state[~state[KEY_HASH].isin(run_state[KEY_HASH])]
+        run_state = pd.concat([state, run_state], ignore_index=True)
+    try:
+        store.save(prune(run_state, today))
+    except Exception as e:
+        # The state is only a cache: a failed save costs a recompute next time
+        logging.warning(f"Could not save the {store.name} state: {e}")
+
+    store.last_stats = {'rows': len(df), 'reused': int(reuse.sum()), 'computed': int((~reuse).sum())}
+    return outputs, store.last_stats
@@ -0,0 +1,48 @@
+import glob
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from . import profiling
+
+
+def expand_inputs(patterns):
+    """Paths matching the glob patterns, in order and without duplicates."""
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern)) or ([pattern] if os.path.exists(pattern) else [])
+        for path in matches:
+            if path not in paths:
+                paths.append(path)
+    return paths
+
+
+def _timed(func, path):
+    start = time.perf_counter()
+    try:
+        # One profiled run per file when JUMIAPIM_PROFILE is set
+        with profiling.span(os.path.basename(path)):
+            result = func(path)
+        return path, result, time.perf_counter() - start, None
+    except Exception as e:
+        return path, None, time.perf_counter() - start, f"{type(e).__name__}: {e}"
+
+
+def run_jobs(func, paths, workers=1):
+    """Run `func(path)` for every path, in a process pool when workers > 1.
+
+    `func` must be picklable (a module-level function or a partial of one).
+    Yields (path, result, seconds, error) as jobs finish; a failing job
+    reports its error instead of stopping the others.
+    """
+    if workers <= 1 or len(paths) <= 1:
+        for path in paths:
+            yield _timed(func, path)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(paths)),
+                             mp_context=multiprocessing.get_context('spawn')) as executor:
+        futures = [executor.submit(_timed, func, path) for path in paths]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+
+def find_conflicts(df, key, value):
+    """(key, value) rows for the keys of `df` that have more than one
+    distinct value, in file order, so the value used comes first."""
+    pairs = df[[key, value]].dropna().drop_duplicates()
+    pairs = pairs[pairs[key].duplicated(keep=False)]
+    return pairs.sort_values(key, kind='stable').reset_index(drop=True)
+
+
+def build_lookup(df, key, value):
+    """Prebuilt key -> value mapping as a Series on a unique Index.
+
+    Blank keys are dropped and the first row wins for repeated keys; keys
+    with more than one value are kept in the table's attrs['conflicts']
+    (see conflicts()). Integer values are stored as nullable Int64.
+    """
+    rows = df[[key, value]].dropna(subset=[key])
+    table = rows.drop_duplicates(subset=[key], keep='first')
+    values = table[value]
+    # Nullable ints, so a missing match doesn't turn the whole column into floats
+    if pd.api.types.is_integer_dtype(values.dtype):
+        values = values.astype('Int64')
+    lookup_table = pd.Series(values.array, index=pd.Index(table[key], name=key), name=value)
+    lookup_table.attrs['conflicts'] = find_conflicts(rows, key, value)
+    return lookup_table
+
+
+def lookup(keys, table):
+    """Look every key up in `table`.
+
+    Returns (values, unmatched): `values` is aligned with `keys` (missing
+    where there is no match) and `unmatched` holds the distinct non-blank
+    keys that were not found. Categorical keys are looked up once per
+    category rather than once per row.
+    """
+    if isinstance(keys.dtype, pd.CategoricalDtype):
+        categories = keys.cat.categories
+        codes = keys.cat.codes.to_numpy()
+        category_positions = table.index.get_indexer(categories)
+        category_values = table.array.take(category_positions, allow_fill=True)
+        values = category_values.take(codes, allow_fill=True)
+
+        used = np.unique(codes[codes >= 0])
+        unmatched = categories[used][category_positions[used] == -1]
+    else:
+        positions = table.index.get_indexer(keys)
+        values = table.array.take(positions, allow_fill=True)
+        unmatched = pd.Index(keys[(positions == -1) & keys.notna().to_numpy()].unique())
+
+    return pd.Series(values, index=keys.index, name=table.name), unmatched
+
+
+def conflicts(keys, table):
+    """(key, value) rows for the distinct `keys` (a Series or Index) that
+    have more than one value in the data `table` was built from."""
+    found = table.attrs.get('conflicts')
+    if found is None or found.empty:
+        return pd.DataFrame(columns=[table.index.name, table.name])
+    return found[found.iloc[:, 0].isin(pd.Index(keys.dropna().unique()))].reset_index(drop=True)
+
+
+def enrich(df, key, table, column):
+    """Add `column` to df in place by looking up `key`; returns the unmatched keys."""
+    df[column], unmatched = lookup(df[key], table)
+    return unmatched
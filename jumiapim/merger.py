@@ -0,0 +1,112 @@
+from datetime import datetime
+
+import pandas as pd
+
+from . import profiling, reference_data
+from .csv_ingest import CATEGORICAL_COLUMNS, INPUT_COLUMNS, TEXT_COLUMNS, detect_delimiter, infer_category_types, read_header, read_seller_exports
+from .lookup_index import conflicts, enrich
+
+# Columns of the Global_<date>.csv output, in order
+SELECTED_COLUMNS = ["SellerName", "Name", "Brand", "PrimaryCategory", "SellerID", "SellerSku", "Category", "Global_Date_Time"]
+
+# Rows per chunk in streaming mode
+STREAM_CHUNK_SIZE = 100_000
+
+
+def enrich_exports(df, seller_ids, categories, timestamp):
+    """Add SellerID, Category and Global_Date_Time in place.
+
+    Returns (unmatched, conflicting): per key column, the SellerName /
+    PrimaryCategory values with no match, and the (key, value) rows of
+    values that have several IDs/categories in the reference files (the
+    first one listed is used)."""
+    with profiling.span('join reference data', rows=len(df)):
+        # Perform VLOOKUP operation with sellers.xlsx
+        unmatched_sellers = enrich(df, 'SellerName', seller_ids, 'SellerID')
+        # Add Category column from category_tree.xlsx
+        unmatched_categories = enrich(df, 'PrimaryCategory', categories, 'Category')
+        conflicting = {'SellerName': conflicts(df['SellerName'], seller_ids),
+                       'PrimaryCategory': conflicts(df['PrimaryCategory'], categories)}
+    # Add Global_Date_Time column
+    df['Global_Date_Time'] = timestamp
+    return {'SellerName': unmatched_sellers, 'PrimaryCategory': unmatched_categories}, conflicting
+
+
+def merge_timestamp():
+    """Value of Global_Date_Time for a run started now (date and hour)."""
+    return datetime.now().strftime("%Y-%m-%d_%H")
+
+
+def output_file_name(timestamp):
+    return f"Global_{timestamp}.csv"
+
+
+def merge_exports(files, timestamp):
+    """Merge seller exports in memory, enriched from the reference files.
+
+    Returns (merged_df, unmatched keys, conflicting keys)."""
+    # Parse the uploads concurrently, reading only the needed columns
+    merged_df = read_seller_exports(files)
+    # Add SellerID, Category and Global_Date_Time; keep SellerSku as it is
+    unmatched, conflicting = enrich_exports(merged_df, reference_data.seller_ids(), reference_data.categories(),
+                                            timestamp)
+    return merged_df, unmatched, conflicting
+
+
+def merged_csv(files, timestamp):
+    """Merged exports rendered as the Global CSV (utf-8-sig bytes), plus
+    unmatched and conflicting keys."""
+    merged_df, unmatched, conflicting = merge_exports(files, timestamp)
+    # Select only specific columns and render them as CSV
+    with profiling.span('write csv', rows=len(merged_df)):
+        data = merged_df[SELECTED_COLUMNS].to_csv(index=False).encode('utf-8-sig')
+    return data, unmatched, conflicting
+
+
+def iter_export_chunks(file, chunksize=STREAM_CHUNK_SIZE):
+    """Read one seller export in chunks of `chunksize` rows.
+
+    Name and SellerSku are read as text so every chunk gets the same dtypes
+    regardless of which rows it happens to contain.
+    """
+    delimiter = detect_delimiter(file)
+    header = read_header(file, delimiter)
+    usecols = [column for column in header if column in INPUT_COLUMNS]
+    dtype = {column: 'category' for column in CATEGORICAL_COLUMNS if column in usecols}
+    dtype.update({column: str for column in TEXT_COLUMNS if column in usecols})
+
+    with pd.read_csv(file, delimiter=delimiter, usecols=usecols, dtype=dtype, chunksize=chunksize) as reader:
+        for chunk in reader:
+            infer_category_types(chunk)
+            # Files without some of the columns still produce the full layout
+            for column in INPUT_COLUMNS:
+                if column not in chunk.columns:
+                    chunk[column] = pd.Series(pd.NA, index=chunk.index, dtype='category')
+            yield chunk
+
+
+def stream_merge(files, output_path, timestamp, chunksize=STREAM_CHUNK_SIZE):
+    """Merge the exports chunk by chunk straight into `output_path`.
+
+    Memory stays at one chunk however many files are uploaded. Returns the
+    unmatched and conflicting keys across all chunks.
+    """
+    seller_ids = reference_data.seller_ids()
+    categories = reference_data.categories()
+    unmatched = {'SellerName': pd.Index([]), 'PrimaryCategory': pd.Index([])}
+    conflicting_keys = {'SellerName': pd.Index([]), 'PrimaryCategory': pd.Index([])}
+    with profiling.span('stream merge') as span, open(output_path, 'w', encoding='utf-8-sig', newline='') as output:
+        header = True
+        span.rows = 0
+        for file in files:
+            for chunk in iter_export_chunks(file, chunksize):
+                chunk_unmatched, chunk_conflicting = enrich_exports(chunk, seller_ids, categories, timestamp)
+                for key, missing in chunk_unmatched.items():
+                    unmatched[key] = unmatched[key].union(missing)
+                    conflicting_keys[key] = conflicting_keys[key].union(chunk_conflicting[key].iloc[:, 0])
+                chunk[SELECTED_COLUMNS].to_csv(output, index=False, header=header)
+                header = False
+                span.rows += len(chunk)
+    conflicting = {'SellerName': conflicts(conflicting_keys['SellerName'], seller_ids),
+                   'PrimaryCategory': conflicts(conflicting_keys['PrimaryCategory'], categories)}
+    return unmatched, conflicting
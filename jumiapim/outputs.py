@@ -0,0 +1,153 @@
+"""Output files written to in-memory buffers: xlsx, CSV and Parquet.
+
+xlsx is written row by row with xlsxwriter in constant_memory mode, so
+besides the frame only one batch of converted rows is held at a time. CSV is
+written by pandas, exactly as to_csv(index=False, encoding='utf-8-sig') writes
+it. 'csv-fast' goes through pyarrow's multithreaded writer instead; it is much
+faster on large frames, but quotes every string and writes floats with no
+fractional part without '.0'.
+"""
+import io
+import math
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+from .readers import HAS_PYARROW
+
+# Matches the header and date styling pandas uses in to_excel
+HEADER_FORMAT = {'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'}
+WORKBOOK_OPTIONS = {'constant_memory': True, 'default_date_format': 'yyyy-mm-dd hh:mm:ss'}
+
+# Data rows per xlsx worksheet (Excel's limit, less the header row)
+MAX_XLSX_ROWS = 1_048_575
+
+# Rows converted to Python values at a time when writing xlsx
+XLSX_BATCH_ROWS = 50_000
+
+CSV_BOM = b'\xef\xbb\xbf'
+
+# format -> (file extension, MIME type)
+FORMATS = {
+    'xlsx': ('xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('csv', 'text/csv'),
+    'csv-fast': ('csv', 'text/csv'),
+    'parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+
+# How to_excel writes infinite numbers (its inf_rep); xlsxwriter rejects them
+INF_REP = 'inf'
+
+
+def _infinite_cells(column):
+    """Mask of the +/-inf values in a float or object column."""
+    if pd.api.types.is_float_dtype(column.dtype):
+        return np.isinf(column.to_numpy(dtype='float64', na_value=np.nan))
+    return np.fromiter((isinstance(value, float) and math.isinf(value) for value in column),
+                       dtype=bool, count=len(column))
+
+
+def _row_batches(df):
+    """Rows of `df` as lists of Python values, with missing values as None
+    and infinite numbers as 'inf' / '-inf'."""
+    # Only float and object columns can hold infinite values
+    positions = [i for i, dtype in enumerate(df.dtypes)
+                 if pd.api.types.is_float_dtype(dtype) or pd.api.types.is_object_dtype(dtype)]
+    for start in range(0, len(df), XLSX_BATCH_ROWS):
+        part = df.iloc[start:start + XLSX_BATCH_ROWS]
+        batch = part.astype(object)
+        batch = batch.where(batch.notna(), None)
+        for i in positions:
+            infinite = _infinite_cells(part.iloc[:, i])
+            if infinite.any():
+                values = batch.iloc[:, i].to_numpy()[infinite]
+                batch.iloc[infinite, i] = np.where(values > 0, INF_REP, f'-{INF_REP}')
+        yield from batch.itertuples(index=False, name=None)
+
+
+def write_xlsx(df, target=None, sheet_name='Sheet1'):
+    """Write `df` as a single-sheet workbook; returns the bytes when no
+    `target` (path or binary file) is given."""
+    if len(df) > MAX_XLSX_ROWS:
+        raise ValueError(f"{len(df)} rows do not fit in one xlsx sheet; use CSV or Parquet instead.")
+    output = io.BytesIO() if target is None else target
+    workbook = xlsxwriter.Workbook(output, WORKBOOK_OPTIONS)
+    worksheet = workbook.add_worksheet(sheet_name)
+    worksheet.write_row(0, 0, [str(column) for column in df.columns], workbook.add_format(HEADER_FORMAT))
+    for i, row in enumerate(_row_batches(df), start=1):
+        worksheet.write_row(i, 0, row)
+    workbook.close()
+    return output.getvalue() if target is None else None
+
+
+def _arrow_ready(df):
+    """Copy of `df` where booleans and datetimes render as pandas writes them."""
+    converted = {}
+    for column, dtype in df.dtypes.items():
+        if pd.api.types.is_bool_dtype(dtype):
+            converted[column] = df[column].map({True: 'True', False: 'False'})
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            converted[column] = df[column].dt.strftime('%Y-%m-%d %H:%M:%S')
+    return df.assign(**converted) if converted else df
+
+
+def write_csv(df, bom=True):
+    """CSV bytes (UTF-8, with a BOM for Excel unless `bom` is false)."""
+    prefix = CSV_BOM if bom else b''
+    return prefix + df.to_csv(index=False).encode('utf-8')
+
+
+def write_csv_fast(df, bom=True):
+    """CSV bytes written by pyarrow: all strings quoted, 1.0 written as 1.
+    Falls back to write_csv when pyarrow is missing or cannot type a column."""
+    prefix = CSV_BOM if bom else b''
+    if HAS_PYARROW:
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+
+        try:
+            table = pa.Table.from_pandas(_arrow_ready(df), preserve_index=False)
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            # Mixed-type object columns; let pandas render them
+            pass
+        else:
+            sink = pa.BufferOutputStream()
+            pa_csv.write_csv(table, sink, pa_csv.WriteOptions(quoting_style='needed'))
+            return prefix + sink.getvalue().to_pybytes()
+    return write_csv(df, bom)
+
+
+def write_parquet(df):
+    """Parquet bytes, for handing results to other tools without re-parsing."""
+    output = io.BytesIO()
+    # Mixed-type object columns cannot be typed; store them as text
+    mixed = [column for column in df.columns
+             if df[column].dtype == object and df[column].dropna().map(type).nunique() > 1]
+    df.astype({column: 'str' for column in mixed}).to_parquet(output, index=False)
+    return output.getvalue()
+
+
+WRITERS = {'xlsx': write_xlsx, 'csv': write_csv, 'csv-fast': write_csv_fast, 'parquet': write_parquet}
+
+# Formats that need pyarrow
+ARROW_FORMATS = {'csv-fast', 'parquet'}
+
+
+def available_formats():
+    """Formats that can be written here; fast CSV and Parquet need pyarrow."""
+    return [file_format for file_format in FORMATS if file_format not in ARROW_FORMATS or HAS_PYARROW]
+
+
+def to_bytes(df, file_format):
+    """`df` rendered in `file_format` ('xlsx', 'csv', 'csv-fast' or 'parquet')."""
+    return WRITERS[file_format](df)
+
+
+def file_name(base_name, file_format):
+    return f'{base_name}.{FORMATS[file_format][0]}'
+
+
+def mime_type(file_format):
+    return FORMATS[file_format][1]
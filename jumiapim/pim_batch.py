@@ -0,0 +1,86 @@
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from . import profiling
+from .color_matcher import build_color_pattern, match_colors
+from .readers import read_upload
+
+# Column dropped from every file before combining
+URL_COLUMN = 'URL_COLUMN_NAME'
+
+# Compiled color pattern, built once per worker process by its initializer
+_worker_pattern = None
+
+
+def _init_worker(colors):
+    global _worker_pattern
+    _worker_pattern = build_color_pattern(colors)
+
+
+def check_colors(df, color_pattern):
+    """Add the PIM color columns (Check, Color_Match, Color_Position) in place."""
+    # Assuming 'COLOR' is the correct column name, adjust it if needed
+    if 'COLOR' in df.columns:
+        colors = match_colors(df['COLOR'], color_pattern)
+        df['Check'] = colors['Check_Color']
+        df['Color_Match'] = colors['Color_Match']
+        df['Color_Position'] = colors['Color_Position']
+
+    # Drop the column containing URLs if it exists
+    if URL_COLUMN in df.columns:
+        df.drop(columns=[URL_COLUMN], inplace=True)
+    return df
+
+
+def check_file(name, data, color_pattern=None):
+    """Parse and color-check one uploaded file.
+
+    Returns (name, df, seconds, error); df is None and error holds the
+    message when the file could not be processed.
+    """
+    start = time.perf_counter()
+    try:
+        df = check_colors(read_upload(io.BytesIO(data)), color_pattern or _worker_pattern)
+        return name, df, time.perf_counter() - start, None
+    except Exception as e:
+        return name, None, time.perf_counter() - start, str(e)
+
+
+def default_workers(file_count):
+    return max(1, min(file_count, os.cpu_count() or 1))
+
+
+def check_files(files, colors, workers=None):
+    """Check many uploads, in a process pool when more than one worker is used.
+
+    `files` is a list of (name, bytes). Returns (combined_df, summary_df):
+    all successfully processed rows concatenated once in upload order, and
+    one summary row per file with its row count, time taken and any error.
+    """
+    workers = workers or default_workers(len(files))
+    with profiling.span('check files') as span:
+        if workers <= 1:
+            color_pattern = build_color_pattern(colors)
+            results = [check_file(name, data, color_pattern) for name, data in files]
+        else:
+            with ProcessPoolExecutor(max_workers=workers,
+                                     mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_worker,
+                                     initargs=(colors,)) as executor:
+                futures = [executor.submit(check_file, name, data) for name, data in files]
+                results = [future.result() for future in futures]
+        span.rows = sum(len(df) for _, df, _, _ in results if df is not None)
+
+    frames = [df for _, df, _, _ in results if df is not None]
+    combined_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    summary_df = pd.DataFrame(
+        [(name, 0 if df is None else len(df), round(seconds, 3), error or '')
+         for name, df, seconds, error in results],
+        columns=['File', 'Rows', 'Seconds', 'Error'],
+    )
+    return combined_df, summary_df
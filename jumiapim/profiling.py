@@ -0,0 +1,203 @@
+"""Stage timing and memory spans.
+
+    with profiling.span('parse') as s:
+        df = read_upload(file)
+        s.rows = len(df)
+
+    @profiling.span('match colors')
+    def match(...): ...
+
+A span records wall time, CPU time, the tracemalloc peak above its starting
+point and an optional row count. Spans nest; finished spans are appended to a
+JSON-lines log (one object per span) when the outermost span or collect()
+block ends. Profiling is off unless JUMIAPIM_PROFILE=1 is set or a collect()
+block is active in the current thread; when off, a span does nothing but one
+thread-local lookup.
+
+CPU time is process-wide (it includes helper threads and other sessions in
+the same process, but not worker processes). tracemalloc is process-wide too,
+so memory figures of concurrent sessions can overlap, and it slows down
+allocation-heavy stages while a run is being profiled.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Spans are appended here as JSON lines
+LOG_FILE = os.environ.get('JUMIAPIM_PROFILE_LOG', os.path.join(BASE_DIR, 'logs', 'profile.jsonl'))
+
+# Profile everything in this process (e.g. CLI runs), not only collect() blocks
+ENABLED = os.environ.get('JUMIAPIM_PROFILE', '') not in ('', '0')
+
+_local = threading.local()
+_log_lock = threading.Lock()
+
+# Runs in progress across threads; tracemalloc stops when the last one ends
+_tracing_lock = threading.Lock()
+_tracing_runs = 0
+
+
+def _state():
+    state = getattr(_local, 'state', None)
+    if state is None:
+        state = _local.state = {'stack': [], 'records': [], 'collecting': 0, 'run': None, 'label': None}
+    return state
+
+
+def is_active():
+    return ENABLED or getattr(_local, 'state', None) is not None and _state()['collecting'] > 0
+
+
+class Span:
+    """One timed stage; use through span()."""
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self._state = None
+
+    def __enter__(self):
+        if not is_active():
+            return self
+        state = self._state = _state()
+        if state['run'] is None:
+            state['run'] = uuid.uuid4().hex[:8]
+            _start_tracing()
+
+        current, peak = tracemalloc.get_traced_memory()
+        # Keep the enclosing span's peak before resetting it for this one
+        if state['stack']:
+            parent = state['stack'][-1]
+            parent._memory_seen = max(parent._memory_seen, peak)
+        tracemalloc.reset_peak()
+        self._memory_start = self._memory_seen = current
+
+        state['stack'].append(self)
+        self._started = datetime.now()
+        self._cpu_start = time.process_time()
+        self._wall_start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        state = self._state
+        if state is None:
+            return False
+        self._state = None
+        wall = time.perf_counter() - self._wall_start
+        cpu = time.process_time() - self._cpu_start
+        self._memory_seen = max(self._memory_seen, tracemalloc.get_traced_memory()[1])
+
+        state['stack'].pop()
+        if state['stack']:
+            parent = state['stack'][-1]
+            parent._memory_seen = max(parent._memory_seen, self._memory_seen)
+
+        state['records'].append({
+            'run': state['run'],
+            'label': state['label'],
+            'span': self.name,
+            'depth': len(state['stack']),
+            'started': self._started.isoformat(timespec='milliseconds'),
+            'wall_s': round(wall, 6),
+            'cpu_s': round(cpu, 6),
+            'mem_peak_mb': round(max(self._memory_seen - self._memory_start, 0) / (1024 * 1024), 3),
+            'rows': self.rows,
+            'rows_per_s': round(self.rows / wall) if self.rows and wall > 0 else None,
+            'error': exc_type.__name__ if exc_type else None,
+        })
+        if not state['stack'] and not state['collecting']:
+            _finish_run(state)
+        return False
+
+    def __call__(self, func):
+        # As a decorator, every call gets a fresh span
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with Span(self.name, self.rows):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def span(name, rows=None):
+    """Context manager / decorator timing the stage `name`."""
+    return Span(name, rows)
+
+
+def _start_tracing():
+    global _tracing_runs
+    with _tracing_lock:
+        _tracing_runs += 1
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+
+def _stop_tracing():
+    global _tracing_runs
+    with _tracing_lock:
+        _tracing_runs -= 1
+        if _tracing_runs == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def _finish_run(state):
+    """Write the run's spans to the log and start a new run."""
+    records, state['records'] = state['records'], []
+    if state['run'] is not None:
+        state['run'] = None
+        _stop_tracing()
+    write_log(records)
+    return records
+
+
+def write_log(records, path=None):
+    if not records:
+        return
+    path = path or LOG_FILE
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with _log_lock, open(path, 'a', encoding='utf-8') as file:
+            for record in records:
+                file.write(json.dumps(record) + '\n')
+    except OSError:
+        # Profiling must never break a run
+        pass
+
+
+@contextmanager
+def collect(enabled=True, label=None):
+    """Profile the spans run inside the block in this thread.
+
+    Yields the list of span records, filled in (in finishing order) when the
+    block ends; it stays empty when `enabled` is false.
+    """
+    records = []
+    if not enabled:
+        yield records
+        return
+    state = _state()
+    state['collecting'] += 1
+    state['label'] = label
+    try:
+        yield records
+    finally:
+        state['collecting'] -= 1
+        if not state['collecting']:
+            records.extend(_finish_run(state))
+            state['label'] = None
+
+
+def read_log(path=None):
+    """All span records in the log, oldest first."""
+    path = path or LOG_FILE
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file if line.strip()]
@@ -0,0 +1,140 @@
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from . import profiling
+
+SELLER_NAME_COL = 'SELLER_NAME'
+CATEGORY_COL = 'CATEGORY'
+APP_COL = 'app'
+REJ_COL = 'rej'
+REASON_COL = 'reason'
+
+
+def aggregate_reasons(df):
+    """App/rej counts per (SELLER_NAME, CATEGORY, reason) in one groupby.
+
+    Groups with neither an app nor a rej entry are dropped and zero counts
+    are shown as ''. Rows are ordered by reason, blanks first and then
+    case-insensitively; ties keep seller/category order.
+    """
+    keys = [SELLER_NAME_COL, CATEGORY_COL, REASON_COL]
+    counts = df.groupby(keys, sort=True)[[APP_COL, REJ_COL]].count()
+    counts = counts[(counts[APP_COL] > 0) | (counts[REJ_COL] > 0)].reset_index()
+
+    # Show zero counts as blanks
+    for column in (APP_COL, REJ_COL):
+        counts[column] = counts[column].astype(object).where(counts[column] != 0, '')
+
+    # Blank reasons first, then case-insensitive, then exact text to break ties
+    reasons = counts[REASON_COL].astype(str)
+    order = np.lexsort((reasons.to_numpy(), reasons.str.lower().to_numpy()))
+    return counts.iloc[order].reset_index(drop=True)
+
+
+def reason_code_text(codes):
+    """Reason codes as trimmed text, with blanks as ''.
+
+    Numeric codes read from an xlsx sheet (1000038, or 1000038.0 when the
+    column has blanks) become '1000038', so they match the text codes of
+    the reason code table.
+    """
+    text = codes.astype(object).where(codes.notna(), '').astype(str).str.strip()
+    return text.str.replace(r'^(\d+)\.0$', r'\1', regex=True)
+
+
+def _reason_table(reason_codes):
+    """The reason code table indexed by its (text) code."""
+    table = reason_codes.assign(code=reason_code_text(reason_codes['code']))
+    return table.drop_duplicates('code').set_index('code')
+
+
+def reason_map(reason_codes):
+    """reason code -> full rejection reason, from the reason code table."""
+    return _reason_table(reason_codes)['reason']
+
+
+def build_pim_df(df, reason_codes):
+    """PIM upload rows (ProductSetSid, ParentSKU, Status, Reason, Comment).
+
+    Each distinct reason code is resolved against the reason code table
+    once; the results are then spread over all rows by position. Blank
+    codes are Approved with no reason; any other code is Rejected, and
+    codes missing from the table keep the old "Approved" reason text.
+    """
+    pim_df = df[['PRODUCT_SET_SID', 'PARENTSKU']].copy()  # Use the correct column names from the input file
+    pim_df.columns = ['ProductSetSid', 'ParentSKU']  # Rename columns for consistency
+
+    codes, uniques = pd.factorize(reason_code_text(df[REASON_COL]))
+    table = _reason_table(reason_codes)
+    approved = uniques == ''
+
+    # One decision per distinct code
+    status = np.where(approved, 'Approved', 'Rejected')
+    # np.where builds a new array; to_numpy may return a read-only view
+    reason = np.where(approved, '', table['reason'].reindex(uniques).fillna('Approved').to_numpy(dtype=object))
+    comment = table['comment'].reindex(uniques).fillna('').to_numpy(dtype=object)
+
+    pim_df['Status'] = status.take(codes)
+    pim_df['Reason'] = reason.take(codes)
+    pim_df['Comment'] = comment.take(codes)
+    return pim_df
+
+
+def format_pivot_table(final_df, reason_codes, today=None):
+    """Turn aggregate_reasons output into the Pivot report layout."""
+    # Apply the updated reason mapping to the 'reason' column
+    final_df['reason'] = final_df['reason'].map(reason_map(reason_codes))
+    
+    # Create a new datetime column
+    final_df['Date_Column'] = (today or datetime.now()).strftime('%Y-%m-%d')
+    
+    # Add two columns before 'SELLER_NAME' with week number and formatted date
+    final_df.insert(0, 'Week_Number', pd.to_datetime(final_df['Date_Column']).dt.isocalendar().week)
+    final_df.insert(1, 'Formatted_Date', pd.to_datetime(final_df['Date_Column']).dt.strftime('%m/%d/%Y'))
+    
+    # Add two columns after 'rej' with 'KE' and 'Charles'
+    final_df.insert(final_df.columns.get_loc('rej') + 1, 'new_col_1', 'KE')
+    final_df.insert(final_df.columns.get_loc('rej') + 2, 'new_col_2', 'Charles')
+    
+    # Add a blank column after 'rej'
+    final_df.insert(final_df.columns.get_loc('rej') + 3, 'Blank_Column', '')
+    
+    # Reorder the columns
+    return final_df[['Week_Number', 'Formatted_Date', 'SELLER_NAME', 'CATEGORY', 'app', 'rej', 'Blank_Column', 'new_col_1', 'new_col_2', 'reason']]
+
+
+def build_reports(df, reason_codes):
+    """Pivot report and PIM upload rows for a QC sheet.
+
+    Reasons in `df` are turned into text in place, with blanks as ''."""
+    # Reason codes as text (numeric ones from xlsx included), blanks as ''
+    df[REASON_COL] = reason_code_text(df[REASON_COL])
+
+    # Count app/rej per seller, category and reason in a single groupby,
+    # sorted with blank reasons first and then alphabetically (case-insensitive)
+    with profiling.span('pivot', rows=len(df)):
+        pivot_df = format_pivot_table(aggregate_reasons(df), reason_codes)
+
+    # Derive Status, Reason and Comment for the PIM file in one pass
+    with profiling.span('PIM rows', rows=len(df)):
+        pim_df = build_pim_df(df, reason_codes)
+    return pivot_df, pim_df
+
+
+def timestamped_name(base_name, now=None):
+    """<base_name>_<date-time>, as used for the Pivot and PIM outputs."""
+    return f'{base_name}_{(now or datetime.now()).strftime("%Y-%m-%d_%H-%M")}'
+
+
+def unique_output_path(folder, base_name, extension, now=None):
+    """<folder>/<base_name>_<date-time>.<ext>, with _1, _2, ... added if taken."""
+    name = timestamped_name(base_name, now)
+    path = os.path.join(folder, f'{name}.{extension}')
+    counter = 1
+    while os.path.exists(path):
+        path = os.path.join(folder, f'{name}_{counter}.{extension}')
+        counter += 1
+    return path
@@ -0,0 +1,98 @@
+import codecs
+import importlib.util
+
+import pandas as pd
+
+from . import profiling
+
+XLSX_MAGIC = b'PK\x03\x04'
+XLS_MAGIC = b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'
+
+HAS_CALAMINE = importlib.util.find_spec('python_calamine') is not None
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+# Encodings tried, in order, when detecting a CSV's encoding
+CSV_ENCODINGS = ('utf-8', 'latin-1')
+
+_BLOCK_SIZE = 1 << 20
+
+
+class UnsupportedFormatError(ValueError):
+    pass
+
+
+def sniff_format(file):
+    """'xlsx', 'xls' or 'csv', from the first bytes of the file rather than its name."""
+    position = file.tell()
+    head = file.read(len(XLS_MAGIC))
+    file.seek(position)
+    if head.startswith(XLSX_MAGIC):
+        return 'xlsx'
+    if head.startswith(XLS_MAGIC):
+        return 'xls'
+    return 'csv'
+
+
+def excel_engine(file_format='xlsx'):
+    """Fastest available engine: python-calamine, else openpyxl (xlsx only)."""
+    if HAS_CALAMINE:
+        return 'calamine'
+    if file_format == 'xls':
+        raise UnsupportedFormatError("Reading .xls files needs python-calamine to be installed.")
+    return 'openpyxl'
+
+
+def detect_encoding(file):
+    """Encoding of a CSV file, found by decoding it block by block once.
+
+    Returns 'utf-8-sig' for UTF-8 with a byte order mark, so the BOM does not
+    end up in the first column name.
+    """
+    position = file.tell()
+    try:
+        head = file.read(len(codecs.BOM_UTF8))
+        if head == codecs.BOM_UTF8:
+            encoding = 'utf-8-sig'
+        else:
+            encoding = 'utf-8'
+        file.seek(position)
+
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            for block in iter(lambda: file.read(_BLOCK_SIZE), b''):
+                decoder.decode(block)
+            decoder.decode(b'', final=True)
+            return encoding
+        except UnicodeDecodeError:
+            # latin-1 decodes any byte sequence
+            return CSV_ENCODINGS[-1]
+    finally:
+        file.seek(position)
+
+
+def read_excel_file(file, file_format='xlsx', **kwargs):
+    return pd.read_excel(file, engine=excel_engine(file_format), **kwargs)
+
+
+def read_csv_file(file, encoding=None, **kwargs):
+    """Read a CSV with pyarrow when available, falling back to the C parser."""
+    encoding = encoding or detect_encoding(file)
+    if HAS_PYARROW:
+        position = file.tell()
+        try:
+            return pd.read_csv(file, encoding=encoding, engine='pyarrow', **kwargs)
+        except ValueError:
+            file.seek(position)
+    return pd.read_csv(file, encoding=encoding, **kwargs)
+
+
+def read_upload(file, **kwargs):
+    """Read an uploaded Excel or CSV file with the fastest available engine."""
+    file_format = sniff_format(file)
+    with profiling.span(f'read {file_format}') as span:
+        if file_format == 'csv':
+            df = read_csv_file(file, **kwargs)
+        else:
+            df = read_excel_file(file, file_format, **kwargs)
+        span.rows = len(df)
+    return df
@@ -0,0 +1,170 @@
+import glob
+import hashlib
+import os
+import threading
+
+import pandas as pd
+
+from .color_matcher import load_colors_from_txt
+from .lookup_index import build_lookup
+from .readers import read_excel_file
+
+# Reference files live in the app root, one level above this package
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Parquet copies of the reference workbooks, so cold starts skip Excel parsing
+SIDECAR_DIR = os.path.join(BASE_DIR, '.reference_cache')
+
+SELLERS_FILE = 'sellers.xlsx'
+CATEGORY_TREE_FILE = 'category_tree.xlsx'
+CATEGORY_FAS_FILE = 'category FAS.xlsx'
+REASONS_FILE = 'reasons.xlsx'
+COMMON_COLORS_FILE = 'common_colors.txt'
+REASON_CODES_FILE = 'reason_codes.csv'
+
+# path -> (mtime/size, sha1, loaded value); shared by every session in the process
+_cache = {}
+_lock = threading.Lock()
+
+# (file, key, value) -> (source table, lookup Series); rebuilt when the table reloads
+_lookups = {}
+
+
+def reference_path(file_name):
+    return os.path.join(BASE_DIR, file_name)
+
+
+def file_digest(path):
+    """SHA-1 of the file contents."""
+    sha1 = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(1 << 20), b''):
+            sha1.update(block)
+    return sha1.hexdigest()
+
+
+def _stat_key(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_cached(file_name, loader):
+    """Load a reference file once per process.
+
+    The cached value is reused while the file's mtime and size are unchanged.
+    When they change the contents are re-hashed, and the file is only
+    reloaded if the hash differs too.
+    """
+    path = reference_path(file_name)
+    stat_key = _stat_key(path)
+    with _lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == stat_key:
+            return entry[2]
+
+        digest = file_digest(path)
+        if entry is not None and entry[1] == digest:
+            value = entry[2]
+        else:
+            value = loader(path, digest)
+        _cache[path] = (stat_key, digest, value)
+        return value
+
+
+def _sidecar_path(path, digest):
+    return os.path.join(SIDECAR_DIR, f"{os.path.basename(path)}.{digest[:16]}.parquet")
+
+
+def _read_excel_with_sidecar(path, digest):
+    sidecar = _sidecar_path(path, digest)
+    if os.path.exists(sidecar):
+        try:
+            return pd.read_parquet(sidecar)
+        except (ImportError, ValueError, OSError):
+            pass
+
+    with open(path, 'rb') as file:
+        df = read_excel_file(file)
+
+    # Persist a Parquet copy for the next cold start; skipped if pyarrow is
+    # missing or the table can't be stored as Parquet
+    try:
+        os.makedirs(SIDECAR_DIR, exist_ok=True)
+        for stale in glob.glob(os.path.join(SIDECAR_DIR, glob.escape(os.path.basename(path)) + '.*.parquet')):
+            os.remove(stale)
+        temp_path = f"{sidecar}.{os.getpid()}.tmp"
+        df.to_parquet(temp_path, index=False)
+        os.replace(temp_path, sidecar)
+    except (ImportError, ValueError, TypeError, OSError):
+        pass
+    return df
+
+
+def _read_reason_codes(path, digest):
+    return pd.read_csv(path, dtype=str, keep_default_na=False)
+
+
+def _read_colors(path, digest):
+    return frozenset(load_colors_from_txt(path))
+
+
+def read_reference_table(file_name):
+    """Cached DataFrame for a reference workbook. Treat it as read-only."""
+    return _load_cached(file_name, _read_excel_with_sidecar)
+
+
+def sellers():
+    return read_reference_table(SELLERS_FILE)
+
+
+def category_tree():
+    return read_reference_table(CATEGORY_TREE_FILE)
+
+
+def category_fas():
+    return read_reference_table(CATEGORY_FAS_FILE)
+
+
+def reasons():
+    return read_reference_table(REASONS_FILE)
+
+
+def reason_codes():
+    """Reason code table (code, reason, comment) used for QC/PIM files."""
+    return _load_cached(REASON_CODES_FILE, _read_reason_codes)
+
+
+def common_colors():
+    return _load_cached(COMMON_COLORS_FILE, _read_colors)
+
+
+def lookup_table(file_name, key, value):
+    """Cached key -> value lookup (see lookup_index) built from a reference workbook."""
+    table = read_reference_table(file_name)
+    cache_key = (file_name, key, value)
+    with _lock:
+        entry = _lookups.get(cache_key)
+        if entry is not None and entry[0] is table:
+            return entry[1]
+    lookup = build_lookup(table, key, value)
+    with _lock:
+        _lookups[cache_key] = (table, lookup)
+    return lookup
+
+
+def seller_ids():
+    return lookup_table(SELLERS_FILE, 'SellerName', 'Seller_ID')
+
+
+def categories():
+    return lookup_table(CATEGORY_TREE_FILE, 'PrimaryCategory', 'Category')
+
+
+def reference_version(file_name):
+    """Content hash of a reference file, as seen by the cache."""
+    path = reference_path(file_name)
+    with _lock:
+        entry = _cache.get(path)
+        if entry is not None and entry[0] == _stat_key(path):
+            return entry[1]
+    return file_digest(path)
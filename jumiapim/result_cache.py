@@ -0,0 +1,152 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+# Memory budget for cached results (pickled size), in MB
+MAX_MEMORY_MB = int(os.environ.get('JUMIAPIM_CACHE_MB', '512'))
+
+# Optional on-disk tier; disabled unless a directory is configured
+DISK_CACHE_DIR = os.environ.get('JUMIAPIM_CACHE_DIR')
+MAX_DISK_MB = int(os.environ.get('JUMIAPIM_CACHE_DISK_MB', '4096'))
+
+
+def _update(sha, part):
+    if isinstance(part, (bytes, bytearray, memoryview)):
+        sha.update(b'b%d:' % len(part))
+        sha.update(part)
+    elif isinstance(part, str):
+        _update(sha, part.encode('utf-8'))
+    elif isinstance(part, (list, tuple)):
+        sha.update(b'l%d:' % len(part))
+        for item in part:
+            _update(sha, item)
+    elif isinstance(part, dict):
+        _update(sha, sorted(part.items()))
+    elif hasattr(part, 'getvalue'):
+        # Uploaded files: hash their contents, not the object
+        _update(sha, part.getvalue())
+    else:
+        _update(sha, repr(part))
+
+
+def fingerprint(*parts):
+    """Content hash of upload bytes, reference versions and options."""
+    sha = hashlib.sha256()
+    for part in parts:
+        _update(sha, part)
+    return sha.hexdigest()
+
+
+class ResultCache:
+    """Content-addressed LRU cache of pipeline results.
+
+    Entries are evicted least-recently-used first once their pickled size
+    passes `max_bytes`. With `disk_dir` set, results are also written there
+    and survive restarts; that tier is trimmed oldest-first to
+    `max_disk_bytes`. Cached values are shared, so treat them as read-only.
+    """
+
+    def __init__(self, max_bytes, disk_dir=None, max_disk_bytes=0):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        data = self._read_disk(key)
+        if data is None:
+            return default
+        value = pickle.loads(data)
+        self._remember(key, value, len(data))
+        return value
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._entries:
+                return True
+        return self.disk_dir is not None and os.path.exists(self._disk_path(key))
+
+    def put(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        self._remember(key, value, len(data))
+        self._write_disk(key, data)
+
+    def get_or_compute(self, key, compute):
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def _remember(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.pkl")
+
+    def _read_disk(self, key):
+        if self.disk_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def _write_disk(self, key, data):
+        if self.disk_dir is None or len(data) > self.max_disk_bytes:
+            return
+        try:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            temp_path = f"{self._disk_path(key)}.{os.getpid()}.tmp"
+            with open(temp_path, 'wb') as file:
+                file.write(data)
+            os.replace(temp_path, self._disk_path(key))
+            self._trim_disk()
+        except OSError:
+            pass
+
+    def _trim_disk(self):
+        entries = []
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith('.pkl'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            os.remove(path)
+            total -= size
+
+
+# Process-wide cache shared by all pages and sessions
+results = ResultCache(MAX_MEMORY_MB * 1024 * 1024, DISK_CACHE_DIR, MAX_DISK_MB * 1024 * 1024)
@@ -0,0 +1,294 @@
+import io
+import math
+import multiprocessing
+import os
+import logging
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+
+import xlsxwriter
+from openpyxl import load_workbook
+
+from . import profiling, reference_data
+from .outputs import HEADER_FORMAT, WORKBOOK_OPTIONS
+
+CHUNK_SIZE = 9998
+PRODUCT_SETS_SHEET = 'ProductSets'
+REASONS_SHEET = 'RejectionReasons'
+
+# A zip with no output given stays in memory up to this size, then spills to a temp file
+ZIP_SPOOL_LIMIT = 64 * 1024 * 1024
+
+
+def estimate_output_files(total_rows, chunk_size):
+    return math.ceil(total_rows / chunk_size)
+
+
+def open_workbook(input_file):
+    """Open an xlsx upload for streaming: nothing is parsed until rows are read."""
+    return load_workbook(input_file, read_only=True, data_only=True)
+
+
+def count_data_rows(worksheet):
+    """Rows below the header, taken from the sheet's <dimension> record.
+
+    Some writers store a bogus "A1" dimension or none at all; only then are
+    the rows actually streamed and counted.
+    """
+    max_row = worksheet.max_row
+    if max_row is None or (max_row == 1 and worksheet.max_column == 1):
+        worksheet.reset_dimensions()
+        max_row = sum(1 for _ in worksheet.iter_rows(values_only=True))
+    return max(max_row - 1, 0)
+
+
+def count_rows(workbook):
+    return sum(count_data_rows(worksheet) for worksheet in workbook.worksheets)
+
+
+def _header_names(values):
+    """Column names the way pandas builds them: blanks become "Unnamed: i",
+    repeated names get a ".1", ".2", ... suffix."""
+    names = []
+    seen = {}
+    for i, value in enumerate(values):
+        name = f"Unnamed: {i}" if value is None else value
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def read_sheet(worksheet):
+    """Return (header, rows) for a worksheet, with rows as a lazy iterator.
+
+    Blank rows are held back until a non-blank row follows, so trailing
+    blank rows are dropped like pd.read_excel does.
+    """
+    # Ignore the stored dimension so badly written files are still read in full
+    worksheet.reset_dimensions()
+    row_iter = worksheet.iter_rows(values_only=True)
+    first_row = next(row_iter, None)
+    if first_row is None:
+        return [], iter(())
+    header = _header_names(first_row)
+
+    def rows():
+        blank_rows = []
+        for row in row_iter:
+            if all(value is None for value in row):
+                blank_rows.append(row)
+                continue
+            yield from blank_rows
+            blank_rows.clear()
+            yield row
+
+    return header, rows()
+
+
+def frame_rows(df):
+    """Header plus data rows of a DataFrame, with missing values as None."""
+    values = df.astype(object).where(df.notna(), None)
+    return [list(df.columns)] + [list(row) for row in values.itertuples(index=False, name=None)]
+
+
+def read_product_sets(workbook):
+    """Rows (header first) of the upload's ProductSets sheet, or just the
+    default header when the sheet is missing."""
+    if PRODUCT_SETS_SHEET not in workbook.sheetnames:
+        return [['ProductSetSid']]
+    header, rows = read_sheet(workbook[PRODUCT_SETS_SHEET])
+    if header:
+        header[0] = 'ProductSetSid'
+    return [header] + [list(row) for row in rows]
+
+
+def iter_chunks(workbook, chunk_size):
+    """Yield (sheet_name, set_number, header, rows) for every chunk of every
+    data sheet. Only one chunk of rows is held in memory at a time."""
+    for sheet_name in workbook.sheetnames:
+        if sheet_name == PRODUCT_SETS_SHEET:
+            continue
+        header, rows = read_sheet(workbook[sheet_name])
+        if header:
+            # Ensure the first column is named "ProductSetSid"
+            header[0] = 'ProductSetSid'
+
+        chunk = []
+        set_number = 1
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield sheet_name, set_number, header, chunk
+                chunk = []
+                set_number += 1
+        if chunk:
+            yield sheet_name, set_number, header, chunk
+
+
+def _merge_row(row, overlay):
+    """Lay the non-blank cells of `overlay` over `row`."""
+    merged = list(row)
+    if len(merged) < len(overlay):
+        merged.extend([None] * (len(overlay) - len(merged)))
+    for i, value in enumerate(overlay):
+        if value is not None:
+            merged[i] = value
+    return merged
+
+
+def write_chunk(target, header, rows, product_set_rows, reasons_rows):
+    """Write one chunk workbook to `target` (a path or a binary file object).
+
+    As when both frames were written to the same sheet through
+    pd.ExcelWriter, the upload's ProductSets rows are laid over the top of
+    the chunk on the ProductSets sheet.
+    """
+    workbook = xlsxwriter.Workbook(target, WORKBOOK_OPTIONS)
+    header_format = workbook.add_format(HEADER_FORMAT)
+
+    worksheet = workbook.add_worksheet(PRODUCT_SETS_SHEET)
+    worksheet.write_row(0, 0, _merge_row(header, product_set_rows[0]), header_format)
+    for i, row in enumerate(rows, start=1):
+        if i < len(product_set_rows):
+            row = _merge_row(row, product_set_rows[i])
+        worksheet.write_row(i, 0, row)
+    for i in range(len(rows) + 1, len(product_set_rows)):
+        worksheet.write_row(i, 0, product_set_rows[i])
+
+    worksheet = workbook.add_worksheet(REASONS_SHEET)
+    worksheet.write_row(0, 0, reasons_rows[0], header_format)
+    for i, row in enumerate(reasons_rows[1:], start=1):
+        worksheet.write_row(i, 0, row)
+
+    workbook.close()
+
+
+def chunk_file_name(current_date, sheet_name, set_number):
+    return f"KE_PIM_{current_date}_{sheet_name}_Set{set_number}.xlsx"
+
+
+def open_zip_buffer():
+    """Buffer for the output zip: a BytesIO that moves to disk past ZIP_SPOOL_LIMIT."""
+    return tempfile.SpooledTemporaryFile(max_size=ZIP_SPOOL_LIMIT)
+
+
+def build_chunk(header, rows, product_set_rows, reasons_rows):
+    """Bytes of one chunk workbook."""
+    chunk_buffer = io.BytesIO()
+    write_chunk(chunk_buffer, header, rows, product_set_rows, reasons_rows)
+    return chunk_buffer.getvalue()
+
+
+# Static sheets, handed to each worker process once by its initializer
+_worker_sheets = None
+
+
+def _init_chunk_worker(product_set_rows, reasons_rows):
+    global _worker_sheets
+    _worker_sheets = (product_set_rows, reasons_rows)
+
+
+def _build_chunk_in_worker(file_name, header, rows):
+    product_set_rows, reasons_rows = _worker_sheets
+    return file_name, len(rows), build_chunk(header, rows, product_set_rows, reasons_rows)
+
+
+def build_chunks(chunks, product_set_rows, reasons_rows, workers=1):
+    """Serialize chunk workbooks, yielding (file_name, row_count, data).
+
+    `chunks` yields (file_name, header, rows). With more than one worker the
+    chunks are built in a process pool and yielded as they complete; at most
+    two chunks per worker are in flight, so memory stays bounded.
+    """
+    if workers <= 1:
+        for file_name, header, rows in chunks:
+            yield file_name, len(rows), build_chunk(header, rows, product_set_rows, reasons_rows)
+        return
+
+    max_pending = workers * 2
+    with ProcessPoolExecutor(max_workers=workers,
+                             mp_context=multiprocessing.get_context('spawn'),
+                             initializer=_init_chunk_worker,
+                             initargs=(product_set_rows, reasons_rows)) as executor:
+        pending = set()
+        for file_name, header, rows in chunks:
+            pending.add(executor.submit(_build_chunk_in_worker, file_name, header, rows))
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        for future in as_completed(pending):
+            yield future.result()
+
+
+def default_workers():
+    return max(1, min(4, os.cpu_count() or 1))
+
+
+def zip_file_name(current_date):
+    return f"PIM_Files_{current_date}.zip"
+
+
+def split_to_zip(workbook, chunk_size, current_date, reasons_rows, workers=1, total_rows=None, progress=None,
+                 output=None):
+    """Split every data sheet of an open workbook into one zip of chunk workbooks.
+
+    The zip is written to `output` (a path or a writable binary file). With
+    no `output` it goes to a spooled temporary file (see open_zip_buffer),
+    returned open at position 0 for the caller to read and close.
+
+    Returns (zip file name, `output` or the spooled file, chunk file names).
+    `progress`, if given, is called with the fraction of rows written as
+    chunks complete.
+    """
+    if total_rows is None:
+        total_rows = count_rows(workbook)
+    output_files = []
+    rows_written = 0
+
+    # Read the ProductSets sheet (header first)
+    with profiling.span('read product sets'):
+        product_set_rows = read_product_sets(workbook)
+
+    # Build every chunk straight into one zip
+    zip_output = open_zip_buffer() if output is None else output
+    try:
+        with profiling.span('write chunks', rows=total_rows), zipfile.ZipFile(zip_output, "w") as zipf:
+            # Stream each sheet; every full chunk is handed to a worker
+            chunks = (
+                (chunk_file_name(current_date, sheet_name, set_number), header, rows)
+                for sheet_name, set_number, header, rows in iter_chunks(workbook, chunk_size)
+            )
+            for output_file_name, row_count, data in build_chunks(chunks, product_set_rows, reasons_rows, workers):
+                zipf.writestr(output_file_name, data)
+                output_files.append(output_file_name)
+
+                rows_written += row_count
+                if progress is not None:
+                    progress(min(rows_written / max(total_rows, 1), 1.0))
+    except BaseException:
+        if output is None:
+            zip_output.close()
+        raise
+
+    logging.info(f"Saved {len(output_files)} files.")
+
+    if output is None:
+        zip_output.seek(0)
+    return zip_file_name(current_date), zip_output, output_files
+
+
+def split_file(input_file, current_date, chunk_size=CHUNK_SIZE, workers=1, progress=None, output=None):
+    """Open `input_file` (path or binary file) and split it with split_to_zip."""
+    reasons_rows = frame_rows(reference_data.reasons())
+    workbook = open_workbook(input_file)
+    try:
+        return split_to_zip(workbook, chunk_size, current_date, reasons_rows, workers, progress=progress,
+                            output=output)
+    finally:
+        workbook.close()
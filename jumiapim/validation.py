@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+
+def build_category_index(category_ids):
+    """Build a hashed index of category IDs once, for reuse by every rule."""
+    return pd.Index(pd.unique(pd.Series(category_ids).dropna()))
+
+
+def in_categories(category_codes, category_index):
+    """Boolean mask: which category codes are in the index."""
+    return category_codes.isin(category_index)
+
+
+def brand_is(brands, brand_name):
+    """Boolean mask: case-insensitive brand comparison, blanks never match."""
+    return brands.astype('string').str.lower().eq(brand_name.lower()).fillna(False).astype(bool)
+
+
+def check_generic_brand(df, fas_index, brand_col='BRAND', category_col='CATEGORY_CODE'):
+    """'No' where a Generic brand is used in a FAS category, otherwise 'Yes'."""
+    invalid = brand_is(df[brand_col], 'generic') & in_categories(df[category_col], fas_index)
+    return pd.Series(np.where(invalid, 'No', 'Yes'), index=df.index)
@@ -1,83 +1,68 @@
-import pandas as pd
-import os
 from datetime import datetime
 import streamlit as st
-import re
 
-def load_colors_from_txt(file_path):
-    with open(file_path, 'r') as file:
-        colors = {line.strip().lower() for line in file.readlines()}
-    return colors
+import utils
+from jumiapim import outputs, profiling, reference_data, result_cache
+from jumiapim.color_check import check_products, color_state, load_rules
+from jumiapim.readers import read_upload
 
-def check_for_color(cell_text, common_colors):
-    if pd.isna(cell_text):
-        return "No"
+def check_upload(uploaded_file, color_pattern, fas_index, progress, output_format, store=None):
+    # Returns the output file bytes and any messages for the user
+    df, messages = check_products(read_upload(uploaded_file), color_pattern, fas_index, progress, store)
 
-    cell_text_lower = cell_text.lower()
-    for color in common_colors:
-        if color in cell_text_lower:
-            return "Yes"
-    return "No"
+    # Build the output file in memory
+    with profiling.span(f'write {output_format}', rows=len(df)):
+        output_data = outputs.to_bytes(df, output_format)
+    return output_data, messages
 
 def main():
     st.title("Process Excel Files")
 
-    # Load common colors from text file
-    common_colors_file = "common_colors.txt"
-    common_colors = load_colors_from_txt(common_colors_file)
-
-    # Read category file
-    category_file = "category FAS.xlsx"
-    category_fas_df = pd.read_excel(category_file, engine='openpyxl')
+    # Compile the color list and index the FAS categories (reference files are cached per process)
+    color_pattern, fas_index = load_rules()
 
     uploaded_file = st.file_uploader("Upload your Excel file", type=['xlsx'])
 
-    if uploaded_file:
-        try:
-            # Read the uploaded file
-            df = pd.read_excel(uploaded_file, engine='openpyxl')
+    # Format of the output file (CSV and Parquet are much faster for large files)
+    output_format = st.selectbox("Output format", outputs.available_formats())
 
-            # Check if 'BRAND' column exists in the uploaded file
-            if 'BRAND' in df.columns:
-                # Check if any value in 'BRAND' column is 'Generic'
-                if df['BRAND'].str.lower().eq('generic').any():
-                    # Create a new column 'check_Brand' in the output file
-                    df['check_Brand'] = df.apply(lambda row:
-                        'No' if row['BRAND'].lower() == 'generic' and row['CATEGORY_CODE'] in category_fas_df['ID'].values else 'Yes',
-                        axis=1
-                    )
-                else:
-                    st.error("Error: No value 'Generic' found in 'BRAND' column of the uploaded file.")
-            else:
-                st.error("Error: 'BRAND' column not found in the uploaded file.")
+    # Reuse color results of earlier uploads for product sets whose COLOR is unchanged
+    incremental = st.checkbox("Only check new or changed product sets", True)
 
-            # Now, let's check for colors
-            if 'COLOR' in df.columns:
-                progress_bar = st.progress(0)
-                total_rows = df.shape[0]
-                processed_rows = 0
-                for index, row in df.iterrows():
-                    df.at[index, 'Check_Color'] = check_for_color(str(row['COLOR']), common_colors)
-                    processed_rows += 1
-                    progress_bar.progress(processed_rows / total_rows)
+    if uploaded_file:
+        try:
+            # Results are cached by upload contents and reference versions, so
+            # reruns (e.g. clicking Download) are instant
+            key = result_cache.fingerprint('color', uploaded_file, output_format,
+                                           reference_data.reference_version(reference_data.COMMON_COLORS_FILE),
+                                           reference_data.reference_version(reference_data.CATEGORY_FAS_FILE))
+            store = color_state() if incremental else None
+            with profiling.span('process'):
+                output_data, messages = result_cache.results.get_or_compute(
+                    key, lambda: check_upload(uploaded_file, color_pattern, fas_index, st.progress(0).progress,
+                                              output_format, store))
+            if store is not None and store.last_stats:
+                st.info(f"{store.last_stats['computed']} of {store.last_stats['rows']} rows checked; "
+                        f"the rest reused earlier results.")
+            for message in messages:
+                st.error(message)
 
-            # Save the output file as Excel
+            # Name the output file
             current_date = datetime.now().strftime('%Y-%m-%d')
-            output_file_name = f"Output_PIM_{current_date}.xlsx"
-            output_file_path = os.path.join(os.getcwd(), output_file_name)
-            df.to_excel(output_file_path, index=False)
+            output_file_name = outputs.file_name(f"Output_PIM_{current_date}", output_format)
 
             # Display success message and provide download link
             st.success(f"Output file '{output_file_name}' created.")
             st.download_button(
                 label="Download Output File",
-                data=open(output_file_path, 'rb').read(),
+                data=output_data,
                 file_name=output_file_name,
-                mime='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+                mime=outputs.mime_type(output_format)
             )
 
         except Exception as e:
             st.error(f"Error: {e}")
 
 if __name__ == "__main__":
-    main()
+    with utils.show_timings("Color"):
+        main()
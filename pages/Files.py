@@ -1,36 +1,21 @@
 import streamlit as st
 import pandas as pd
 import os
-from datetime import datetime
-import csv
-
-def detect_delimiter(file):
-    # Read a sample of the file to detect the delimiter
-    sample = file.read(1024)
-    file.seek(0)  # Reset file pointer to beginning
-    # Decode the sample bytes to a string
-    sample_str = sample.decode('utf-8')
-    # Use CSV Sniffer to detect delimiter
-    dialect = csv.Sniffer().sniff(sample_str)
-    return dialect.delimiter
-
-def merge_csv_files(uploaded_files):
-    dfs = []
-    for file in uploaded_files:
-        delimiter = detect_delimiter(file)
-        dfs.append(pd.read_csv(file, delimiter=delimiter))
-    merged_df = pd.concat(dfs, ignore_index=True)
-    # Perform VLOOKUP operation with sellers.xlsx
-    sellers_df = pd.read_excel("sellers.xlsx")
-    merged_df = pd.merge(merged_df, sellers_df[['SellerName', 'Seller_ID']], on='SellerName', how='left')
-    merged_df.rename(columns={'Seller_ID': 'SellerID'}, inplace=True)
-    # Add Category column from category_tree.xlsx
-    category_tree_df = pd.read_excel("category_tree.xlsx")
-    merged_df = pd.merge(merged_df, category_tree_df[['PrimaryCategory', 'Category']], on='PrimaryCategory', how='left')
-    # Add Global_Date_Time column
-    merged_df['Global_Date_Time'] = datetime.now().strftime("%Y-%m-%d_%H")
-    # Keep SellerSku as it is
-    return merged_df
+import tempfile
+
+import utils
+from jumiapim import profiling, reference_data, result_cache
+from jumiapim.merger import merge_timestamp, merged_csv, output_file_name, stream_merge
+
+def stream_to_temp_file(uploaded_files, current_datetime):
+    """Streaming merge into a temp file of its own; returns (path, lookup report)."""
+    descriptor, path = tempfile.mkstemp(prefix='Global_', suffix='.csv')
+    os.close(descriptor)
+    try:
+        return path, stream_merge(uploaded_files, path, current_datetime)
+    except BaseException:
+        os.remove(path)
+        raise
 
 def main():
     st.title("CSV File Merger")
@@ -38,26 +23,59 @@ def main():
     # Allow user to add CSV files
     uploaded_files = st.file_uploader("Upload CSV files to merge", accept_multiple_files=True)
 
+    # Streaming mode keeps memory constant for exports larger than RAM
+    streaming = st.checkbox("Streaming mode (for very large exports)")
+
     if uploaded_files:
-        # Merge the uploaded CSV files
-        merged_df = merge_csv_files(uploaded_files)
+        # Generate output file name with current date and hour
+        current_datetime = merge_timestamp()
+        output_file = output_file_name(current_datetime)
 
-        # Select only specific columns
-        selected_columns = ["SellerName", "Name", "Brand", "PrimaryCategory", "SellerID", "SellerSku", "Category", "Global_Date_Time"]
-        merged_df = merged_df[selected_columns]
+        # Results are cached by upload contents, reference versions and output
+        # hour, so reruns (e.g. clicking Download) don't merge again
+        key = result_cache.fingerprint('merge', streaming, uploaded_files, current_datetime,
+                                       reference_data.reference_version(reference_data.SELLERS_FILE),
+                                       reference_data.reference_version(reference_data.CATEGORY_TREE_FILE))
 
-        # Generate output file name with current date and hour
-        current_datetime = datetime.now().strftime("%Y-%m-%d_%H")
-        output_file = f"Global_{current_datetime}.csv"
+        if streaming:
+            # Merge chunk by chunk into a temp file owned by this session. The
+            # file and its lookup report are kept together by key, so a rerun
+            # serves this upload's merge and never another session's output
+            previous = st.session_state.get('merge_stream')
+            if previous is not None and previous[0] == key and os.path.exists(previous[1]):
+                _, stream_path, (unmatched, conflicting) = previous
+            else:
+                with profiling.span('merge'):
+                    stream_path, (unmatched, conflicting) = stream_to_temp_file(uploaded_files, current_datetime)
+                if previous is not None and os.path.exists(previous[1]):
+                    os.remove(previous[1])
+                st.session_state['merge_stream'] = (key, stream_path, (unmatched, conflicting))
+            file_content = None
+        else:
+            # Merge the uploaded CSV files in memory
+            with profiling.span('merge'):
+                file_content, unmatched, conflicting = result_cache.results.get_or_compute(
+                    key, lambda: merged_csv(uploaded_files, current_datetime))
+
+        # Report keys missing from sellers.xlsx / category_tree.xlsx
+        for key, missing in unmatched.items():
+            if len(missing):
+                with st.expander(f"{len(missing)} {key} value(s) not found in the reference files"):
+                    st.write(pd.DataFrame({key: missing}))
 
-        # Save the selected columns to a CSV file
-        merged_df.to_csv(output_file, index=False, encoding='utf-8-sig')
+        # Report keys with several IDs/categories; the first one listed is used
+        for key, rows in conflicting.items():
+            if len(rows):
+                with st.expander(f"{rows[key].nunique()} {key} value(s) with conflicting entries in the reference files"):
+                    st.write(rows)
 
         # Offer download button for the merged CSV file
         if st.button("Download merged CSV file"):
-            with open(output_file, "rb") as file:
-                file_content = file.read()
+            if file_content is None:
+                with open(stream_path, "rb") as file:
+                    file_content = file.read()
             st.download_button(label="Download", data=file_content, file_name=output_file)
 
 if __name__ == "__main__":
-    main()
+    with utils.show_timings("Files"):
+        main()
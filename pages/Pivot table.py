@@ -1,142 +1,48 @@
-import pandas as pd
-from datetime import datetime
-import os
 import streamlit as st
-import base64
+
+import utils
+from jumiapim import outputs, profiling, qc_report, reference_data, result_cache
+from jumiapim.readers import UnsupportedFormatError, read_upload
 
 # Define a function to process the input and generate output files
-def process_files(input_file):
-    # Define the output folder
-    output_folder = f'PIM_output_{datetime.now().strftime("%Y-%m-%d_%H-%M")}'
-    os.makedirs(output_folder, exist_ok=True)
-    
-    # Check for existing files and generate unique filenames for Pivot and PIM output
-    base_output_file = 'Pivot_Date'
-    pivot_output_file = f'{base_output_file}_{datetime.now().strftime("%Y-%m-%d_%H-%M")}.csv'
-    counter = 1
-    while os.path.exists(os.path.join(output_folder, pivot_output_file)):
-        pivot_output_file = f'{base_output_file}_{datetime.now().strftime("%Y-%m-%d_%H-%M")}_{counter}.csv'
-        counter += 1
-    
-    # Read the file into a DataFrame (handle both Excel and CSV files)
-    if input_file.name.endswith('.xlsx') or input_file.name.endswith('.xls'):
-        df = pd.read_excel(input_file, engine='openpyxl')
-    elif input_file.name.endswith('.csv'):
-        try:
-            df = pd.read_csv(input_file, encoding='utf-8')
-        except UnicodeDecodeError:
-            # If UTF-8 encoding fails, try 'latin-1' encoding
-            df = pd.read_csv(input_file, encoding='latin-1')
-    else:
+def process_files(input_file, output_format):
+    # Reuse the result for the same upload, reason code table and format, so
+    # reruns don't redo the whole pipeline
+    key = result_cache.fingerprint('pivot', input_file, output_format,
+                                   reference_data.reference_version(reference_data.REASON_CODES_FILE))
+    try:
+        with profiling.span('process'):
+            pim_df, pim_data, pim_file_name = result_cache.results.get_or_compute(
+                key, lambda: build_output_files(input_file, output_format))
+    except UnsupportedFormatError:
         st.error("Unsupported file format. Please upload an Excel (.xls, .xlsx) or CSV file.")
         return False
-    
-    # Specify the column names
-    seller_name_col = 'SELLER_NAME'
-    category_col = 'CATEGORY'
-    app_col = 'app'
-    rej_col = 'rej'
-    reason_col = 'reason'
-    
-    # Replace blank values in the 'reason' column with ''
-    df[reason_col] = df[reason_col].fillna('')
-    
-    # Map values under 'reason' to the desired replacements
-    reason_mapping = {
-        'col': '1000005 - Kindly confirm the actual product colour',
-        'cat': '1000004 - Wrong Category',
-        'var': '1000038 - Kindly Ensure ALL Sizes Of This Product Are Created As Variants Under This Product & Not Created As Unique Products',
-        'bra': '1000007 - Other Reason',
-        
-    }
-    
-    # Create a pivot table without totals
-    pivot_table = pd.pivot_table(df,
-                                 values=[app_col, rej_col],
-                                 index=[seller_name_col, category_col, reason_col],
-                                 aggfunc='count',
-                                 fill_value=0)
-    
-    # Reset index to create a DataFrame from the pivot table
-    table_df = pivot_table.reset_index()
-    
-    # Melt the DataFrame to convert it to the desired format
-    melted_df = pd.melt(table_df, id_vars=[seller_name_col, category_col, reason_col],
-                        var_name='type', value_name='count')
-    
-    # Filter rows with non-empty 'count' values
-    melted_df = melted_df[melted_df['count'] != 0]
-    
-    # Pivot the melted DataFrame to get separate columns for app and rej counts
-    final_df = melted_df.pivot_table(index=['SELLER_NAME', 'CATEGORY', 'reason'],
-                                     columns='type', values='count', fill_value='').reset_index()
-    
-    # Custom sorting function to keep the original case for 'Wrong Variation - means size only'
-    def custom_sort(x):
-        return ('' if x == '' else x.lower(), x)
-    
-    # Sort 'reason' column with blanks first and then alphabetically using the custom sorting function
-    final_df['reason'] = final_df['reason'].apply(lambda x: '' if x == '' else x)
-    final_df.sort_values(by='reason', inplace=True, key=lambda x: x.map(custom_sort) if x.dtype == 'O' else x)
-    
-    # Apply the updated reason mapping to the 'reason' column
-    final_df['reason'] = final_df['reason'].map(reason_mapping)
-    
-    # Create a new datetime column
-    final_df['Date_Column'] = datetime.now().strftime('%Y-%m-%d')
-    
-    # Add two columns before 'SELLER_NAME' with week number and formatted date
-    final_df.insert(0, 'Week_Number', pd.to_datetime(final_df['Date_Column']).dt.isocalendar().week)
-    final_df.insert(1, 'Formatted_Date', pd.to_datetime(final_df['Date_Column']).dt.strftime('%m/%d/%Y'))
-    
-    # Add two columns after 'rej' with 'KE' and 'Charles'
-    final_df.insert(final_df.columns.get_loc('rej') + 1, 'new_col_1', 'KE')
-    final_df.insert(final_df.columns.get_loc('rej') + 2, 'new_col_2', 'Charles')
-    
-     # Add a blank column after 'rej'
-    final_df.insert(final_df.columns.get_loc('rej') + 3, 'Blank_Column', '')
-    
-    # Reorder the columns,
-    final_df = final_df[['Week_Number', 'Formatted_Date', 'SELLER_NAME', 'CATEGORY', 'app', 'rej', 'Blank_Column', 'new_col_1', 'new_col_2', 'reason']]
-    
-    # Modify PIM DataFrame creation to handle additional requirements
-    pim_df = df[['PRODUCT_SET_SID', 'PARENTSKU']].copy()  # Use the correct column names from the input file
-    pim_df.columns = ['ProductSetSid', 'ParentSKU']  # Rename columns for consistency
 
-    # Apply mapping for 'reason' to generate 'Status' and 'Reason' columns
-    pim_df['Status'] = df['reason'].apply(lambda x: 'Approved' if pd.isna(x) or x == '' else 'Rejected')
-    pim_df['Reason'] = df['reason'].map(reason_mapping).fillna('Approved')  # Fill blank reasons with 'Approved'
-    
-    # Add Comment column
-    pim_df['Comment'] = df['reason'].apply(lambda x: 'Please Use Fashion as brand name for Fashion items' if x == 'bra' else '')
-
-    # Modify Reason column based on Status
-    pim_df.loc[pim_df['Status'] == 'Approved', 'Reason'] = ''
-    
-    # Save the PIM DataFrame to an Excel file
-    pim_output_file = f'PIM_Date_Time_{datetime.now().strftime("%Y-%m-%d_%H-%M")}.xlsx'
-    counter = 1
-    while os.path.exists(os.path.join(output_folder, pim_output_file)):
-        pim_output_file = f'PIM_Date_Time_{datetime.now().strftime("%Y-%m-%d_%H-%M")}_{counter}.xlsx'
-        counter += 1
-    
-    pim_output_path = os.path.join(output_folder, pim_output_file)
-    pim_df.to_excel(pim_output_path, index=False) 
-
-    # Display success message with downloadable link for PIM file
-    st.markdown(get_download_link(pim_output_path, "Download PIM File"), unsafe_allow_html=True)
+    # Offer the PIM file for download
+    st.download_button(label="Download PIM File", data=pim_data, file_name=pim_file_name,
+                       mime=outputs.mime_type(output_format))
     
     # Display the data from the PIM file
     st.subheader("Data from PIM File")
     st.write(pim_df)   # Add a blank
 
-# Function to create a download link for a file
-def get_download_link(file_path, text):
-    with open(file_path, 'rb') as file:
-        contents = file.read()
-    encoded = base64.b64encode(contents).decode()
-    href = f'<a href="data:file/csv;base64,{encoded}" download="{os.path.basename(file_path)}">{text}</a>'
-    return href
+# Build the Pivot table and PIM file; returns the PIM data, file contents and file name
+def build_output_files(input_file, output_format):
+    # Read the file into a DataFrame (Excel or CSV, detected from its contents)
+    try:
+        df = read_upload(input_file)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise UnsupportedFormatError(str(e)) from e
+    
+    # Reason codes and their texts/comments come from reason_codes.csv
+    pivot_df, pim_df = qc_report.build_reports(df, reference_data.reason_codes())
+    
+    # Render the PIM file in memory
+    pim_file_name = outputs.file_name(qc_report.timestamped_name('PIM_Date_Time'), output_format)
+    with profiling.span(f'write {output_format}', rows=len(pim_df)):
+        pim_data = outputs.to_bytes(pim_df, output_format)
+
+    return pim_df, pim_data, pim_file_name
 
 # Streamlit app
 def main():
@@ -145,6 +51,9 @@ def main():
     
     # File uploader
     uploaded_file = st.file_uploader("Upload an Excel/CSV file", type=["xls", "xlsx", "csv"])
+
+    # Format of the PIM file (CSV and Parquet are much faster for large files)
+    output_format = st.selectbox("PIM file format", outputs.available_formats())
     
     if uploaded_file is not None:
         # Display file details
@@ -153,8 +62,9 @@ def main():
         st.write(file_details)
         
         # Process the uploaded file
-        if process_files(uploaded_file):
+        if process_files(uploaded_file, output_format):
             st.stop()  # Stop the Streamlit app execution
 
 if __name__ == "__main__":
-    main()
+    with utils.show_timings("Pivot table"):
+        main()
@@ -1,121 +1,100 @@
-import pandas as pd
 import streamlit as st
 from datetime import datetime
-import string
+from functools import partial
 import logging
-import zipfile
 import os
-import math
-import base64
 
-# Function to estimate the number of output files
-def estimate_output_files(total_rows, chunk_size):
-    return math.ceil(total_rows / chunk_size)
+import utils
+from jumiapim import profiling, reference_data, result_cache, splitter
+from jumiapim.readers import sniff_format
+
+def read_zip(zip_file):
+    """Contents of a split result's zip, read when the download is requested."""
+    zip_file.seek(0)
+    return zip_file.read()
 
 # Function to split and save Excel file
-def split_and_save_excel(input_file, chunk_size=9998):
+def split_and_save_excel(input_file, chunk_size=splitter.CHUNK_SIZE):
+    # Only xlsx workbooks can be streamed
+    if sniff_format(input_file) != 'xlsx':
+        st.error("Error reading Excel file. Please make sure it's a valid Excel file.")
+        return [], 0
+
+    # Open the workbook in streaming mode; sheets are only parsed when read
     try:
-        excel_file = pd.ExcelFile(input_file)
-    except pd.errors.ExcelFileError as e:
+        workbook = splitter.open_workbook(input_file)
+    except Exception as e:
         logging.error(f"Error reading Excel file: {e}")
         st.error("Error reading Excel file. Please make sure it's a valid Excel file.")
         return [], 0
 
-    # Get the directory of the uploaded file
-    uploaded_file_directory = os.path.dirname(os.path.abspath(input_file.name))
-
-    # Get the path to the 'reasons.xlsx' file in the same directory as the uploaded file
-    reasons_file_path = os.path.join(uploaded_file_directory, "reasons.xlsx")
+    try:
+        return _split_workbook(input_file, workbook, chunk_size)
+    finally:
+        workbook.close()
 
-    # Check if the 'reasons.xlsx' file exists
-    if not os.path.exists(reasons_file_path):
+def _split_workbook(input_file, workbook, chunk_size):
+    # Read the data from the 'reasons.xlsx' file (cached per process)
+    try:
+        reasons_rows = splitter.frame_rows(reference_data.reasons())
+    except FileNotFoundError:
         st.error("The 'reasons.xlsx' file does not exist.")
         return [], 0
 
-    # Read the data from the 'reasons.xlsx' file
-    reasons_df = pd.read_excel(reasons_file_path)
-
     # Check if the required sheet "ProductSets" is present
-    if "ProductSets" not in excel_file.sheet_names:
+    if splitter.PRODUCT_SETS_SHEET not in workbook.sheetnames:
         st.warning("Input file doesn't have a 'ProductSets' sheet. Creating an empty sheet.")
-        product_sets_df = pd.DataFrame(columns=["ProductSetSid"])
-    else:
-        # Read the ProductSets sheet
-        product_sets_df = excel_file.parse("ProductSets")
-        # Ensure the first column is named "ProductSetSid"
-        product_sets_df.columns.values[0] = "ProductSetSid"
-
-    # Get total number of rows in the input file
-    total_rows = 0
-    for sheet_name in excel_file.sheet_names:
-        df = excel_file.parse(sheet_name)
-        total_rows += len(df)
+
+    # Get total number of rows in the input file from the sheet dimensions
+    total_rows = splitter.count_rows(workbook)
 
     # Display total number of rows
     st.write(f"Total number of rows in input file: {total_rows}")
 
     # Estimate number of output files based on chunk size
-    est_output_files = estimate_output_files(total_rows, chunk_size)
+    est_output_files = splitter.estimate_output_files(total_rows, chunk_size)
     st.write(f"Estimated number of output files: {est_output_files}")
 
     # Slider for choosing chunk size
     chunk_size = st.slider("Choose number of rows per chunk", min_value=6500, max_value=9998, value=chunk_size)
 
+    # Number of processes writing chunk workbooks (1 writes them one by one)
+    workers = st.number_input("Parallel workers", min_value=1, max_value=os.cpu_count() or 1,
+                              value=splitter.default_workers())
+
     current_date = datetime.now().strftime("%Y-%m-%d")
-    output_files = []
+
+    # The last split is kept for this session by upload contents and options,
+    # so reruns (e.g. clicking Download) show it again without re-splitting.
+    # Its zip stays in a spooled temp file (on disk past splitter.ZIP_SPOOL_LIMIT)
+    # instead of being copied into the shared result cache.
+    key = result_cache.fingerprint('split', input_file, chunk_size, current_date,
+                                   reference_data.reference_version(reference_data.REASONS_FILE))
+    previous = st.session_state.get('split_result')
+    result = previous[1] if previous is not None and previous[0] == key else None
 
     if st.button("Split Files"):
         # Progress bar
         progress_bar = st.progress(0)
+        with profiling.span('split', rows=total_rows):
+            result = splitter.split_to_zip(workbook, chunk_size, current_date, reasons_rows, int(workers),
+                                           total_rows, progress_bar.progress)
+        if previous is not None:
+            previous[1][1].close()
+        st.session_state['split_result'] = (key, result)
 
-        progress_value = 0
-        progress_increment = 100 / total_rows
-
-        for sheet_name in excel_file.sheet_names:
-            if sheet_name == 'ProductSets':
-                continue
-            
-            df = excel_file.parse(sheet_name)
-            df_chunks = [df[i:i+chunk_size] for i in range(0, len(df), chunk_size)]
-
-            for i, chunk in enumerate(df_chunks):
-                output_file_name = f"KE_PIM_{current_date}_{sheet_name}_Set{i + 1}.xlsx"
-                with pd.ExcelWriter(output_file_name, engine='xlsxwriter') as writer:
-                    # Ensure the first column is named "ProductSetSid"
-                    chunk.columns.values[0] = "ProductSetSid"
-                    chunk.to_excel(writer, sheet_name='ProductSets', index=False)
-                    product_sets_df.to_excel(writer, sheet_name='ProductSets', index=False)
-                    reasons_df.to_excel(writer, sheet_name='RejectionReasons', index=False)
-                output_files.append(output_file_name)
-
-                # Update progress bar
-                progress_value += progress_increment
-                progress_bar.progress(progress_value)
-
-        logging.info(f"Saved {len(output_files)} files.")
-
-        # Create a zip file
-        zip_file_name = f"PIM_Files_{current_date}.zip"
-        with zipfile.ZipFile(zip_file_name, "w") as zipf:
-            for file in output_files:
-                zipf.write(file)
-
-        # Download the zipped file
-        with open(zip_file_name, "rb") as f:
-            zip_data = f.read()
-            b64_zip_data = base64.b64encode(zip_data).decode('utf-8')
-            href = f'<a href="data:application/zip;base64,{b64_zip_data}" download="{zip_file_name}">Click here to download the zipped file</a>'
-            st.markdown(href, unsafe_allow_html=True)
-
-        # Display individual files as downloadable links
+    output_files = []
+    if result is not None:
+        zip_file_name, zip_file, output_files = result
+
+        # Download the zipped file; it is only read when the button is clicked
+        st.download_button(label="Download zipped files", data=partial(read_zip, zip_file),
+                           file_name=zip_file_name, mime="application/zip")
+
+        # List the files inside the zip
         st.write("Individual Files:")
         for file in output_files:
             st.write(file)
-            with open(file, "rb") as f:
-                st.download_button(label="Download", data=f, file_name=file)
-
-        # Remove the zip file
-        os.remove(zip_file_name)
 
     return output_files, total_rows
 
@@ -127,6 +106,7 @@ st.title("Excel File Splitter")
 
 uploaded_file = st.file_uploader("Upload an Excel file", type=["xlsx"])
 
-if uploaded_file is not None:
-    st.write("Uploaded file:", uploaded_file.name)
-    output_files, total_rows = split_and_save_excel(uploaded_file)
+with utils.show_timings("Split Files"):
+    if uploaded_file is not None:
+        st.write("Uploaded file:", uploaded_file.name)
+        output_files, total_rows = split_and_save_excel(uploaded_file)
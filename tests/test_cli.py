@@ -0,0 +1,11 @@
+from jumiapim import cli
+
+
+def test_colors_reports_checks_that_could_not_run(tmp_path, capsys):
+    upload = tmp_path / 'products.csv'
+    upload.write_text('PRODUCT_SET_SID,COLOR\nPS1,blue\n')
+
+    assert cli.main(['colors', str(upload), '-o', str(tmp_path / 'out')]) == 0
+    captured = capsys.readouterr()
+    assert captured.out.startswith('ok ')
+    assert "'BRAND' column not found" in captured.err
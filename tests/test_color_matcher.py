@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from jumiapim import color_matcher
+
+COLORS = {'blue', 'sky blue', 'red', 'off-white', 'white', 'rose gold', 'gold'}
+
+
+@pytest.fixture(params=[True, False], ids=['pyarrow', 're'])
+def pattern(request, monkeypatch):
+    # Both ways of extracting the matched term
+    monkeypatch.setattr(color_matcher, 'HAS_PYARROW', request.param and color_matcher.HAS_PYARROW)
+    return color_matcher.build_color_pattern(COLORS)
+
+
+def check(values, pattern):
+    result = color_matcher.match_colors(pd.Series(values, dtype=object), pattern)
+    return list(zip(result['Check_Color'], result['Color_Match'], result['Color_Position']))
+
+
+def test_multi_word_and_hyphenated_terms(pattern):
+    assert check(['Sky Blue', 'OFF-WHITE shirt', 'Rose Gold watch'], pattern) == [
+        ('Yes', 'sky blue', 0), ('Yes', 'off-white', 0), ('Yes', 'rose gold', 0)]
+
+
+def test_leftmost_term_wins_then_the_longest(pattern):
+    assert check(['Red and sky blue', 'dark sky blue', 'Multi gold'], pattern) == [
+        ('Yes', 'red', 0), ('Yes', 'sky blue', 5), ('Yes', 'gold', 6)]
+
+
+def test_no_match_missing_and_non_string_cells(pattern):
+    assert check(['Assorted', None, np.nan, 123, True, ''], pattern) == [('No', '', -1)] * 6
+
+
+def test_batches_match_a_single_pass(pattern):
+    values = pd.Series(['blue', None, 'Matte red', 42, 'beige', 'white gold'] * 7, dtype=object)
+    expected = color_matcher.match_colors(values, pattern)
+    result = color_matcher.match_colors_in_batches(values, pattern, max_updates=5)
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_load_colors_from_txt(tmp_path):
+    path = tmp_path / 'colors.txt'
+    path.write_text('Blue\n\n  Sky Blue \nblue\n')
+    assert color_matcher.load_colors_from_txt(path) == {'blue', 'sky blue'}
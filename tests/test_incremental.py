@@ -0,0 +1,60 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from jumiapim import incremental
+
+
+def upper(part):
+    return pd.DataFrame({'out': part['x'].str.upper()}, index=part.index)
+
+
+def run(df, store, today):
+    return incremental.update(df, store, ['k'], ['x'], ['out'], upper, today=today)
+
+
+def test_empty_state_is_treated_as_missing(tmp_path):
+    store = incremental.StateStore('test', ('v1',), str(tmp_path))
+    run(pd.DataFrame({'k': pd.Series([], dtype=str), 'x': pd.Series([], dtype=str)}), store, '2026-01-01')
+
+    outputs, stats = run(pd.DataFrame({'k': ['a', 'b'], 'x': ['p', 'q']}), store, '2026-01-02')
+    assert outputs['out'].tolist() == ['P', 'Q']
+    assert stats == {'rows': 2, 'reused': 0, 'computed': 2}
+
+
+def test_rows_not_seen_recently_are_pruned(tmp_path, monkeypatch):
+    monkeypatch.setattr(incremental, 'MAX_AGE_DAYS', 30)
+    store = incremental.StateStore('test', ('v1',), str(tmp_path))
+    run(pd.DataFrame({'k': ['a', 'b'], 'x': ['p', 'q']}), store, '2026-01-01')
+    run(pd.DataFrame({'k': ['b'], 'x': ['q']}), store, '2026-01-20')
+    assert len(store.load()) == 2
+
+    run(pd.DataFrame({'k': ['b'], 'x': ['q']}), store, '2026-02-15')
+    assert len(store.load()) == 1
+
+    monkeypatch.setattr(incremental, 'MAX_ROWS', 2)
+    run(pd.DataFrame({'k': ['c', 'd', 'e'], 'x': ['r', 's', 't']}), store, '2026-02-16')
+    assert len(store.load()) == 2
+
+
+def test_concurrent_updates_all_succeed(tmp_path):
+    store = incremental.StateStore('test', ('v1',), str(tmp_path))
+    df = pd.DataFrame({'k': [f'k{i}' for i in range(1000)], 'x': ['p'] * 1000})
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: run(df, store, '2026-01-01'), range(16)))
+
+    assert all(outputs['out'].eq('P').all() for outputs, _ in results)
+    assert sorted(os.listdir(tmp_path)) == [os.path.basename(store.path)]
+
+
+def test_failed_save_does_not_fail_the_run(tmp_path, monkeypatch):
+    store = incremental.StateStore('test', ('v1',), str(tmp_path))
+
+    def fail(state):
+        raise OSError('disk full')
+    monkeypatch.setattr(store, 'save', fail)
+
+    outputs, stats = run(pd.DataFrame({'k': ['a'], 'x': ['p']}), store, '2026-01-01')
+    assert outputs['out'].tolist() == ['P']
+    assert stats['computed'] == 1
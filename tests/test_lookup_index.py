@@ -0,0 +1,25 @@
+import pandas as pd
+
+from jumiapim import lookup_index
+
+SELLERS = pd.DataFrame({
+    'SellerName': ['Shop A', 'Shop B', 'Shop A', 'Shop C', 'Shop B'],
+    'Seller_ID': ['KE1', 'KE2', 'KE3', 'KE4', 'KE2'],
+})
+
+
+def test_first_value_wins_and_conflicts_are_reported():
+    table = lookup_index.build_lookup(SELLERS, 'SellerName', 'Seller_ID')
+    keys = pd.Series(['Shop A', 'Shop B', 'Shop D', None])
+
+    values, unmatched = lookup_index.lookup(keys, table)
+    assert values.tolist()[:2] == ['KE1', 'KE2']
+    assert unmatched.tolist() == ['Shop D']
+
+    conflicts = lookup_index.conflicts(keys, table)
+    assert conflicts.to_dict('list') == {'SellerName': ['Shop A', 'Shop A'], 'Seller_ID': ['KE1', 'KE3']}
+
+
+def test_no_conflicts_for_keys_not_in_the_upload():
+    table = lookup_index.build_lookup(SELLERS, 'SellerName', 'Seller_ID')
+    assert lookup_index.conflicts(pd.Series(['Shop C']).astype('category'), table).empty
@@ -0,0 +1,29 @@
+import io
+
+from jumiapim import csv_ingest, merger
+
+# Numeric-looking SKUs with a blank and a leading zero
+EXPORT = (b"SellerName;Name;Brand;PrimaryCategory;SellerSku\n"
+          b"Shop A;123;Generic;1000005;00123\n"
+          b"Shop B;Kettle;Generic;;\n"
+          b"Shop A;Blender;Generic;1000005;7\n")
+
+
+def test_sku_and_name_are_read_as_text():
+    df = csv_ingest.read_seller_export(io.BytesIO(EXPORT))
+    assert df['SellerSku'].tolist()[::2] == ['00123', '7']
+    assert df['Name'].tolist()[0] == '123'
+
+
+def test_streaming_output_matches_in_memory_output(tmp_path):
+    data, _, _ = merger.merged_csv([io.BytesIO(EXPORT)], 'T')
+    output_path = tmp_path / 'Global_T.csv'
+    merger.stream_merge([io.BytesIO(EXPORT)], str(output_path), 'T', chunksize=2)
+    assert output_path.read_bytes() == data
+
+
+def test_primary_category_is_written_as_an_integer_next_to_blanks():
+    # The old whole-file merge wrote 1000005.0 when any PrimaryCategory was blank
+    data, _, _ = merger.merged_csv([io.BytesIO(EXPORT)], 'T')
+    rows = data.decode('utf-8-sig').splitlines()
+    assert [row.split(',')[3] for row in rows[1:]] == ['1000005', '', '1000005']
@@ -0,0 +1,23 @@
+import io
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from jumiapim import outputs
+
+
+def read_xlsx(data):
+    worksheet = load_workbook(io.BytesIO(data)).active
+    return [[cell.value for cell in row] for row in worksheet.iter_rows()]
+
+
+def test_xlsx_writes_infinite_numbers_like_to_excel():
+    df = pd.DataFrame({
+        'float': [1.5, np.inf, -np.inf, np.nan],
+        'mixed': pd.Series(['a', np.inf, None, -np.inf], dtype=object),
+    })
+    expected = io.BytesIO()
+    df.to_excel(expected, index=False)
+
+    assert read_xlsx(outputs.write_xlsx(df)) == read_xlsx(expected.getvalue())
@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+
+from jumiapim import qc_report
+
+REASON_CODES = pd.DataFrame({
+    'code': ['1000038', 'col'],
+    'reason': ['1000038 - Kindly Ensure ALL Sizes Of This Product Are Created As Variants', '1000005 - Colour'],
+    'comment': ['Create variants', ''],
+})
+
+
+def qc_sheet(reasons):
+    rows = len(reasons)
+    return pd.DataFrame({
+        'PRODUCT_SET_SID': [f'PS{i}' for i in range(rows)],
+        'PARENTSKU': [f'P{i}' for i in range(rows)],
+        'SELLER_NAME': 'Seller',
+        'CATEGORY': 'Fashion',
+        'app': [None if reason else 'x' for reason in reasons],
+        'rej': ['x' if reason else None for reason in reasons],
+        'reason': reasons,
+    })
+
+
+def test_numeric_reason_codes_match_text_codes():
+    # As read from an xlsx sheet: numbers, floats when the column has blanks
+    df = qc_sheet([1000038.0, np.nan, 'col'])
+    pivot_df, pim_df = qc_report.build_reports(df, REASON_CODES)
+
+    assert pim_df['Status'].tolist() == ['Rejected', 'Approved', 'Rejected']
+    assert pim_df['Reason'].tolist() == [REASON_CODES['reason'][0], '', REASON_CODES['reason'][1]]
+    assert pim_df['Comment'].tolist() == ['Create variants', '', '']
+    assert REASON_CODES['reason'][0] in pivot_df['reason'].tolist()
+
+
+def test_reason_code_text():
+    codes = pd.Series([1000038, 1000038.0, ' col ', None, '10.5'], dtype=object)
+    assert qc_report.reason_code_text(codes).tolist() == ['1000038', '1000038', 'col', '', '10.5']
+
+
+def test_object_string_columns():
+    # Object-dtype strings, where to_numpy can return read-only views
+    with pd.option_context('future.infer_string', False):
+        df = qc_sheet([1000038, None, 'col'])
+        _, pim_df = qc_report.build_reports(df, REASON_CODES.astype(object))
+    assert pim_df['Reason'].tolist() == [REASON_CODES['reason'][0], '', REASON_CODES['reason'][1]]
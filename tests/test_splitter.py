@@ -0,0 +1,87 @@
+import io
+import zipfile
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from jumiapim import reference_data, splitter
+
+CHUNK_SIZE = 2
+
+
+def upload_workbook(path):
+    """Two data sheets: blank and repeated header names, a blank row inside
+    the data and trailing blank rows, plus a ProductSets sheet."""
+    workbook = Workbook()
+    product_sets = workbook.active
+    product_sets.title = splitter.PRODUCT_SETS_SHEET
+    product_sets.append(['sid', 'Note'])
+    product_sets.append(['PS-BATCH', 'first'])
+    product_sets.append(['PS-OTHER', None])
+
+    upload = workbook.create_sheet('Upload_1')
+    upload.append(['Sid', 'Status', None, 'Status', 'Score'])
+    upload.append(['PS1', 'Approved', 'x', 'a', 1])
+    upload.append(['PS2', 'Rejected', None, 'b', 2.5])
+    upload.append([None, None, None, None, None])
+    upload.append(['PS3', 'Approved', 'y', None, None])
+    upload.append(['PS4', 'Rejected', 'z', 'c', 4])
+    upload.append([None, None, None, None, None])
+    upload.append([None, None, None, None, None])
+
+    upload = workbook.create_sheet('Upload_2')
+    upload.append(['ProductSetSid', 'ParentSKU'])
+    upload.append(['PS5', 'P5'])
+    workbook.save(path)
+
+
+def old_split(path, current_date):
+    """Chunk workbooks as the page wrote them with pd.ExcelWriter."""
+    excel_file = pd.ExcelFile(path)
+    product_sets_df = excel_file.parse(splitter.PRODUCT_SETS_SHEET)
+    product_sets_df.columns.values[0] = 'ProductSetSid'
+    reasons_df = reference_data.reasons()
+
+    chunks = {}
+    for sheet_name in excel_file.sheet_names:
+        if sheet_name == splitter.PRODUCT_SETS_SHEET:
+            continue
+        df = excel_file.parse(sheet_name)
+        for i, start in enumerate(range(0, len(df), CHUNK_SIZE)):
+            chunk = df[start:start + CHUNK_SIZE]
+            chunk.columns.values[0] = 'ProductSetSid'
+            output = io.BytesIO()
+            with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+                chunk.to_excel(writer, sheet_name='ProductSets', index=False)
+                product_sets_df.to_excel(writer, sheet_name='ProductSets', index=False)
+                reasons_df.to_excel(writer, sheet_name='RejectionReasons', index=False)
+            chunks[splitter.chunk_file_name(current_date, sheet_name, i + 1)] = output.getvalue()
+    return chunks
+
+
+def cell_values(data):
+    workbook = load_workbook(io.BytesIO(data))
+    return {worksheet.title: [list(row) for row in worksheet.iter_rows(values_only=True)]
+            for worksheet in workbook.worksheets}
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_split_matches_the_excelwriter_layout(tmp_path, workers):
+    path = tmp_path / 'upload.xlsx'
+    upload_workbook(path)
+
+    zip_name, zip_file, output_files = splitter.split_file(str(path), 'D', CHUNK_SIZE, workers=workers)
+    with zip_file, zipfile.ZipFile(zip_file) as archive:
+        chunks = {name: archive.read(name) for name in archive.namelist()}
+
+    expected = old_split(path, 'D')
+    assert zip_name == 'PIM_Files_D.zip'
+    # Worker processes add chunks to the zip as they complete
+    assert output_files == list(expected) if workers == 1 else sorted(output_files) == sorted(expected)
+    for name, data in expected.items():
+        assert cell_values(chunks[name]) == cell_values(data), name
+
+
+def test_header_names_follow_pandas():
+    assert splitter._header_names(['a', None, 'a', 'a', None]) == ['a', 'Unnamed: 1', 'a.1', 'a.2', 'Unnamed: 4']
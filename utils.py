@@ -14,9 +14,16 @@
 
 import inspect
 import textwrap
+from contextlib import contextmanager
 
+import pandas as pd
 import streamlit as st
 
+from jumiapim import profiling
+
+# Span fields shown in the timings panel
+TIMING_COLUMNS = ['span', 'wall_s', 'cpu_s', 'mem_peak_mb', 'rows', 'rows_per_s']
+
 
 def show_code(demo):
     """Showing the code of the demo."""
@@ -26,3 +33,20 @@ def show_code(demo):
         st.markdown("## Code")
         sourcelines, _ = inspect.getsourcelines(demo)
         st.code(textwrap.dedent("".join(sourcelines[1:])))
+
+
+@contextmanager
+def show_timings(page_name):
+    """Profile the stages run inside the block and show them in the sidebar."""
+    show_timings = st.sidebar.checkbox("Show timings", False)
+    with profiling.collect(show_timings, label=page_name) as records:
+        yield
+    if show_timings:
+        st.sidebar.markdown("## Timings")
+        if records:
+            # Parents before their stages, indented by nesting depth
+            timings = pd.DataFrame(sorted(records, key=lambda record: record['started']))
+            timings['span'] = [' ' * 4 * depth + name for depth, name in zip(timings['depth'], timings['span'])]
+            st.sidebar.dataframe(timings[TIMING_COLUMNS], hide_index=True)
+        else:
+            st.sidebar.write("No stages ran.")